@@ -0,0 +1,76 @@
+# In-memory audio decoding
+#
+# Uploads are decoded straight from the request bytes. libsndfile reads
+# WAV/FLAC/OGG/MP3 from a memory buffer; only containers it cannot parse
+# (m4a/aac) are spilled to a private temp file for audioread.
+import io
+import os
+import tempfile
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+from features import SAMPLE_RATE
+
+# Resamplers, best quality first. "kaiser_best" is what librosa.load uses and
+# what the model was trained with; "polyphase" is exact for integer ratios
+# such as 8 kHz -> 16 kHz and much cheaper.
+RESAMPLERS = ("kaiser_best", "kaiser_fast", "polyphase")
+DEFAULT_RESAMPLER = "kaiser_best"
+
+# Upload formats this libsndfile build decodes itself (MP3 needs >= 1.1);
+# anything else (m4a/aac) goes through the file fallback
+BUFFER_FORMATS = {'.wav', '.flac', '.ogg', '.mp3'} & {
+    f".{name.lower()}" for name in sf.available_formats()
+}
+
+
+def _decode_buffer(data: bytes, suffix: str):
+    try:
+        with sf.SoundFile(io.BytesIO(data)) as f:
+            y = f.read(dtype='float32', always_2d=False).T
+            return librosa.to_mono(y), f.samplerate
+    except sf.LibsndfileError as e:
+        raise ValueError(f"Could not decode {suffix} audio: {e.error_string}") from None
+
+
+def _decode_file(data: bytes, suffix: str):
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return librosa.load(path, sr=None, mono=True)
+    finally:
+        os.unlink(path)
+
+
+def resample(y: np.ndarray, orig_sr: int, target_sr: int = SAMPLE_RATE,
+             res_type: str = DEFAULT_RESAMPLER) -> np.ndarray:
+    if res_type not in RESAMPLERS:
+        raise ValueError(f"Unknown resampler '{res_type}', expected one of {RESAMPLERS}")
+    if orig_sr == target_sr:
+        return y
+    return librosa.resample(y, orig_sr=orig_sr, target_sr=target_sr, res_type=res_type)
+
+
+def decode_native(data: bytes, suffix: str):
+    """Decode an in-memory upload to mono float32; returns (y, native_sr).
+
+    Formats libsndfile owns are decoded from memory only, so malformed
+    uploads fail fast with its error rather than hitting the disk.
+    """
+    suffix = suffix.lower()
+    if suffix in BUFFER_FORMATS:
+        return _decode_buffer(data, suffix)
+    return _decode_file(data, suffix)
+
+
+def decode_audio(data: bytes, suffix: str, sr: int = SAMPLE_RATE,
+                 res_type: str = DEFAULT_RESAMPLER) -> np.ndarray:
+    """Decode an in-memory upload to mono float32 at ``sr``.
+
+    With the default resampler this matches ``librosa.load(path, sr=sr)``.
+    """
+    y, native_sr = decode_native(data, suffix)
+    return resample(y, native_sr, sr, res_type)
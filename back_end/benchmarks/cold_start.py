@@ -0,0 +1,87 @@
+"""First-request latency after a cold start, with and without warm-up.
+
+Starts the API in a fresh uvicorn process per scenario and measures the time
+until it answers /health, the first /predict latency and the steady-state
+latency of the following requests. Scenarios:
+  cold         WARM_UP=0 with an empty numba cache (a fresh deploy)
+  cached       WARM_UP=0 with the numba cache left by the previous run
+  warm         WARM_UP=1 with the numba cache (the default)
+The result cache is disabled so every request does the full work.
+
+Usage (from back_end/):
+    python benchmarks/cold_start.py [--data ../Sound_data] [--requests 5] [--port 8765]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import requests
+
+BACK_END = Path(__file__).resolve().parents[1]
+
+
+def wait_healthy(url: str, process: subprocess.Popen, timeout: float = 120) -> dict:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            sys.exit("Server exited during startup")
+        try:
+            return requests.get(f"{url}/health", timeout=1).json()
+        except requests.RequestException:
+            time.sleep(0.05)
+    sys.exit("Server did not come up")
+
+
+def predict_ms(url: str, path: Path) -> float:
+    with open(path, "rb") as f:
+        start = time.perf_counter()
+        response = requests.post(f"{url}/predict", files={"file": (path.name, f, "audio/wav")})
+    response.raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+
+def run_scenario(name: str, env: dict, clips, port: int):
+    url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACK_END, env={**os.environ, "CACHE_MAX_BYTES": "0", **env},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        health = wait_healthy(url, process)
+        up = time.perf_counter() - start
+        first = predict_ms(url, clips[0])
+        steady = [predict_ms(url, path) for path in clips[1:]]
+    finally:
+        process.terminate()
+        process.wait()
+    print(f"{name:<8}up {up:5.2f} s  ready {str(health['ready']):<5}  first /predict {first:7.1f} ms  "
+          f"steady {np.median(steady):6.1f} ms  cold_start {health['cold_start']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", type=Path, default=BACK_END.parent / "Sound_data")
+    parser.add_argument("--requests", type=int, default=5, help="requests per scenario")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    clips = sorted(args.data.glob("*/*.wav"))[:max(2, args.requests)]
+    if not clips:
+        sys.exit(f"No .wav files found under {args.data}")
+
+    with tempfile.TemporaryDirectory() as numba_cache:
+        env = {"NUMBA_CACHE_DIR": numba_cache}
+        run_scenario("cold", {**env, "WARM_UP": "0"}, clips, args.port)
+        run_scenario("cached", {**env, "WARM_UP": "0"}, clips, args.port)
+        run_scenario("warm", {**env, "WARM_UP": "1"}, clips, args.port)
+
+
+if __name__ == "__main__":
+    main()
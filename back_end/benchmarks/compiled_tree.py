@@ -0,0 +1,80 @@
+"""Parity and speed of the array-compiled decision tree.
+
+Checks that inference.CompiledTree gives bit-identical predict_proba/predict
+output to the loaded sklearn model on Sound_data features, on perturbed
+copies of them, and on rows sitting exactly on split thresholds. Then times
+per-row sklearn calls against batched compiled calls.
+
+Usage (from back_end/):
+    python benchmarks/compiled_tree.py [--data ../Sound_data] [--limit N]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio import DEFAULT_RESAMPLER  # noqa: E402
+from inference import compile_model  # noqa: E402
+from worker import extract_features  # noqa: E402
+
+MODEL_PATH = Path(__file__).resolve().parents[1] / "Model" / "saved_model" / "best_model.joblib"
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", type=Path,
+                        default=Path(__file__).resolve().parents[2] / "Sound_data")
+    parser.add_argument("--limit", type=int, default=50, help="clips to featurize")
+    args = parser.parse_args()
+
+    clips = sorted(args.data.glob("*/*.wav"))[::-1][:args.limit]
+    if not clips:
+        sys.exit(f"No .wav files found under {args.data}")
+    model = joblib.load(MODEL_PATH)
+    compiled = compile_model(model)
+    if compiled is None:
+        sys.exit(f"{model.__class__.__name__} cannot be compiled")
+
+    real = np.stack([extract_features(p.read_bytes(), p.name, DEFAULT_RESAMPLER) for p in clips])
+    rng = np.random.default_rng(0)
+    noisy = np.repeat(real, 20, axis=0)
+    noisy *= rng.normal(1.0, 0.2, size=noisy.shape)
+    # Put every split feature exactly on its threshold (float32-rounded)
+    edge = np.repeat(real[:1], compiled.threshold.size, axis=0)
+    for row, (feature, threshold) in enumerate(zip(compiled.feature, compiled.threshold)):
+        if feature >= 0:
+            edge[row, feature] = np.float32(threshold)
+    X = np.vstack([real, noisy, edge])
+
+    assert np.array_equal(compiled.predict_proba(X), model.predict_proba(X))
+    assert np.array_equal(compiled.predict(X), model.predict(X))
+    print(f"parity OK on {len(X)} rows (max_depth={compiled.max_depth}, "
+          f"nodes={compiled.threshold.size})")
+
+    row = real[:1]
+    single_sklearn = timed(lambda: model.predict_proba(row), 500)
+    single_compiled = timed(lambda: compiled.predict_proba(row), 500)
+    print(f"single row   sklearn {1e6 * single_sklearn:8.1f} us  "
+          f"compiled {1e6 * single_compiled:8.1f} us")
+    for size in (4, 16, 64):
+        batch = X[:size]
+        per_row = timed(lambda: [model.predict_proba(r[None]) for r in batch], 50)
+        batched = timed(lambda: compiled.predict_proba(batch), 500)
+        print(f"batch of {size:<3} sklearn per-row {1e6 * per_row / size:8.1f} us/row  "
+              f"compiled {1e6 * batched / size:8.1f} us/row")
+
+
+if __name__ == "__main__":
+    main()
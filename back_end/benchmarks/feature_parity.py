@@ -0,0 +1,117 @@
+"""Parity check and per-stage timings for the shared-spectrogram feature engine.
+
+Compares features.compute_features against the original per-feature librosa
+pipeline on every clip in Sound_data and reports the largest deviation and
+where the time goes.
+
+Usage (from back_end/):
+    python benchmarks/feature_parity.py [--data ../Sound_data] [--limit N]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import librosa
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from features import FEATURE_DIM, SAMPLE_RATE, compute_features  # noqa: E402
+
+# Features are compared with np.allclose(new, ref, rtol=RTOL, atol=ATOL)
+RTOL = 1e-5
+ATOL = 1e-6
+
+
+def reference_features(y: np.ndarray, sr: int) -> np.ndarray:
+    """The pre-engine extract_audio_features body, kept verbatim as the oracle."""
+    n_mfcc = 40
+    n_fft = 1024
+    hop_length = 10 * 16
+    win_length = 25 * 16
+    window = 'hann'
+    n_mels = 128
+    n_bands = 7
+    fmin = 100
+
+    mfcc = np.mean(librosa.feature.mfcc(
+        y=y, sr=sr, n_mfcc=n_mfcc, n_fft=n_fft,
+        hop_length=hop_length, win_length=win_length,
+        window=window
+    ).T, axis=0)
+
+    mel = np.mean(librosa.feature.melspectrogram(
+        y=y, sr=sr, n_fft=n_fft, hop_length=hop_length,
+        win_length=win_length, window='hann', n_mels=n_mels
+    ).T, axis=0)
+
+    stft = np.abs(librosa.stft(y))
+    chroma = np.mean(librosa.feature.chroma_stft(S=stft, y=y, sr=sr).T, axis=0)
+    contrast = np.mean(librosa.feature.spectral_contrast(
+        S=stft, y=y, sr=sr, n_fft=n_fft, hop_length=hop_length,
+        win_length=win_length, n_bands=n_bands, fmin=fmin
+    ).T, axis=0)
+    tonnetz = np.mean(librosa.feature.tonnetz(y=y, sr=sr).T, axis=0)
+
+    return np.concatenate((mfcc, chroma, mel, contrast, tonnetz))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", type=Path,
+                        default=Path(__file__).resolve().parents[2] / "Sound_data")
+    parser.add_argument("--limit", type=int, default=None, help="only check the first N clips")
+    args = parser.parse_args()
+
+    clips = sorted(args.data.glob("*/*.wav"))[:args.limit]
+    if not clips:
+        sys.exit(f"No .wav files found under {args.data}")
+
+    # Warm up numba/FFT plans so the first clip doesn't skew either side
+    warm = librosa.load(clips[0], sr=SAMPLE_RATE)[0]
+    reference_features(warm, SAMPLE_RATE)
+    compute_features(warm, SAMPLE_RATE)
+
+    ref_time = 0.0
+    new_time = 0.0
+    stages = {}
+    worst = (0.0, None)
+    failures = []
+
+    for path in clips:
+        y, sr = librosa.load(path, sr=SAMPLE_RATE)
+
+        start = time.perf_counter()
+        ref = reference_features(y, sr)
+        ref_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        new = compute_features(y, sr, timings=stages)
+        new_time += time.perf_counter() - start
+
+        assert new.shape == (FEATURE_DIM,), new.shape
+        err = float(np.max(np.abs(new - ref) / (ATOL + RTOL * np.abs(ref))))
+        if err > worst[0]:
+            worst = (err, path)
+        if not np.allclose(new, ref, rtol=RTOL, atol=ATOL):
+            failures.append(path)
+
+    n = len(clips)
+    print(f"clips: {n}  feature_dim: {FEATURE_DIM}  tolerance: rtol={RTOL} atol={ATOL}")
+    print(f"worst deviation: {worst[0]:.3g}x tolerance ({worst[1].name if worst[1] else '-'})")
+    print(f"reference: {1000 * ref_time / n:8.2f} ms/clip")
+    print(f"engine:    {1000 * new_time / n:8.2f} ms/clip  ({ref_time / new_time:.2f}x)")
+    for stage, seconds in stages.items():
+        print(f"  {stage:<10}{1000 * seconds / n:8.2f} ms/clip")
+
+    if failures:
+        print(f"PARITY FAILED on {len(failures)} clip(s):")
+        for path in failures:
+            print(f"  {path}")
+        sys.exit(1)
+    print("parity OK")
+
+
+if __name__ == "__main__":
+    main()
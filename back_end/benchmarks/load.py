@@ -0,0 +1,175 @@
+"""In-process load benchmark for /predict and /predict/batch.
+
+Drives the FastAPI app through httpx's ASGI transport (no network, same
+worker pool, batcher and model as production) with Sound_data clips at a
+fixed concurrency (by default the worker pool's admission capacity, the
+most it accepts without rejecting), and reports latency percentiles, throughput, rejections
+and the mean time per stage from the app's own metrics. Rejected (503)
+requests are retried after --backoff seconds and counted; their latency
+includes the retries. The result cache is off unless --cache is given, so
+every request does the full work.
+
+Save a run with --save and compare later runs against it with --baseline;
+the script exits non-zero if p95 latency or throughput regresses by more
+than --tolerance.
+
+Needs httpx, which the API itself doesn't: pip install -r requirements-bench.txt
+
+Usage (from back_end/):
+    python benchmarks/load.py [--concurrency N] [--requests 200] [--endpoint predict]
+                              [--save baseline.json] [--baseline baseline.json]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+BACK_END = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACK_END))
+
+
+async def drive(app, clips, endpoint: str, concurrency: int, total: int, batch_files: int,
+                backoff: float):
+    """Send ``total`` requests, ``concurrency`` at a time.
+
+    Returns (latencies, final statuses, rejections, seconds).
+    """
+    path = "/predict" if endpoint == "predict" else "/predict/batch"
+    cycle = itertools.cycle(clips)
+    latencies, statuses = [], []
+    rejections = 0
+
+    async def one(client):
+        nonlocal rejections
+        if endpoint == "predict":
+            clip = next(cycle)
+            files = {"file": (clip[0], clip[1], "audio/wav")}
+        else:
+            files = [("files", (name, data, "audio/wav"))
+                     for name, data in itertools.islice(cycle, batch_files)]
+        start = time.perf_counter()
+        response = await client.post(path, files=files)
+        while response.status_code == 503:
+            rejections += 1
+            await asyncio.sleep(backoff)
+            response = await client.post(path, files=files)
+        latencies.append(time.perf_counter() - start)
+        statuses.append(response.status_code)
+
+    remaining = iter(range(total))
+
+    async def worker(client):
+        for _ in remaining:
+            await one(client)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return np.array(latencies), np.array(statuses), rejections, elapsed
+
+
+def stage_means(main) -> dict:
+    """Mean milliseconds per stage from the app's histograms."""
+    histogram = main.stage_seconds
+    return {labels[0]: round(1000 * histogram.sums[labels] / histogram.count(*labels), 2)
+            for labels in histogram.counts}
+
+
+async def run(args) -> dict:
+    if not args.cache:
+        os.environ["CACHE_MAX_BYTES"] = "0"
+    import main  # noqa: E402 - settings are read at import time
+
+    clips = sorted(args.data.glob("*/*.wav"))
+    if not clips:
+        sys.exit(f"No .wav files found under {args.data}")
+    clips = [(path.name, path.read_bytes()) for path in clips[:args.clips]]
+
+    await main.startup_event()
+    if not main.ready:
+        sys.exit("App did not become ready (is the model in Model/saved_model/?)")
+    try:
+        # Stage histograms should only describe the measured run
+        main.stage_seconds.clear()
+        # A batch request occupies up to one slot per worker
+        slots_per_request = 1 if args.endpoint == "predict" else main.pool.workers
+        concurrency = args.concurrency or max(1, main.pool.capacity // slots_per_request)
+        latencies, statuses, rejections, elapsed = await drive(
+            main.app, clips, args.endpoint, concurrency, args.requests, args.batch_files,
+            args.backoff
+        )
+        stages = stage_means(main) if main.METRICS else {}
+    finally:
+        await main.shutdown_event()
+
+    ok = latencies[statuses == 200] * 1000
+    files_per_request = 1 if args.endpoint == "predict" else args.batch_files
+    return {
+        "endpoint": args.endpoint,
+        "concurrency": concurrency,
+        "requests": len(statuses),
+        "ok": int(len(ok)),
+        "rejected": rejections,
+        "failed": int(np.sum(statuses != 200)),
+        "p50_ms": round(float(np.percentile(ok, 50)), 1) if len(ok) else None,
+        "p95_ms": round(float(np.percentile(ok, 95)), 1) if len(ok) else None,
+        "p99_ms": round(float(np.percentile(ok, 99)), 1) if len(ok) else None,
+        "throughput_files_per_s": round(len(ok) * files_per_request / elapsed, 2),
+        "worker_mode": main.WORKER_MODE,
+        "workers": main.pool.workers,
+        "stage_mean_ms": stages,
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> bool:
+    """Print the change against a saved run; False if it regressed beyond ``tolerance``."""
+    ok = True
+    for key, higher_is_better in (("p95_ms", False), ("throughput_files_per_s", True)):
+        old, new = baseline.get(key), result.get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        verdict = "REGRESSION" if worse > tolerance else "ok"
+        ok &= worse <= tolerance
+        print(f"{key}: {old} -> {new} ({change:+.1%}) {verdict}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", type=Path, default=BACK_END.parent / "Sound_data")
+    parser.add_argument("--endpoint", choices=("predict", "batch"), default="predict")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="concurrent clients (default: worker pool capacity)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--clips", type=int, default=100, help="distinct clips to cycle through")
+    parser.add_argument("--batch-files", type=int, default=8, help="files per /predict/batch request")
+    parser.add_argument("--backoff", type=float, default=0.05,
+                        help="seconds to wait before retrying a 503")
+    parser.add_argument("--cache", action="store_true", help="leave the result cache on")
+    parser.add_argument("--save", type=Path, help="write the result as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare with a saved result")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative regression against the baseline")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=1))
+    if args.save:
+        args.save.write_text(json.dumps(result, indent=1))
+    if args.baseline and not compare(result, json.loads(args.baseline.read_text()), args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
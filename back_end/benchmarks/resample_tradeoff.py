@@ -0,0 +1,75 @@
+"""Accuracy/latency tradeoff of the in-memory decoder's resamplers.
+
+Decodes every clip in Sound_data from memory with each resampler, runs the
+full feature + model path, and reports decode latency, end-to-end latency,
+agreement with the kaiser_best predictions, and accuracy against the folder
+labels. Also checks that the buffer path matches librosa.load.
+
+Usage (from back_end/):
+    python benchmarks/resample_tradeoff.py [--data ../Sound_data] [--limit N]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import librosa
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio import DEFAULT_RESAMPLER, RESAMPLERS, decode_audio  # noqa: E402
+from features import SAMPLE_RATE, compute_features  # noqa: E402
+
+MODEL_PATH = Path(__file__).resolve().parents[1] / "Model" / "saved_model" / "best_model.joblib"
+LABEL_DIRS = ["belly_pain", "burping", "discomfort", "hungry", "tired"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", type=Path,
+                        default=Path(__file__).resolve().parents[2] / "Sound_data")
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N clips")
+    args = parser.parse_args()
+
+    clips = sorted(args.data.glob("*/*.wav"))[:args.limit]
+    if not clips:
+        sys.exit(f"No .wav files found under {args.data}")
+    labels = np.array([LABEL_DIRS.index(p.parent.name) for p in clips])
+    blobs = [p.read_bytes() for p in clips]
+    model = joblib.load(MODEL_PATH)
+
+    # The default buffer path must be a drop-in replacement for librosa.load
+    for path, data in zip(clips[:20], blobs):
+        expected = librosa.load(path, sr=SAMPLE_RATE)[0]
+        if not np.array_equal(decode_audio(data, path.suffix), expected):
+            sys.exit(f"decode_audio differs from librosa.load on {path}")
+
+    results = {}
+    for res_type in RESAMPLERS:
+        compute_features(decode_audio(blobs[0], ".wav", res_type=res_type))  # warm-up
+
+        decode_time = 0.0
+        total_time = 0.0
+        preds = []
+        for data in blobs:
+            start = time.perf_counter()
+            y = decode_audio(data, ".wav", res_type=res_type)
+            decode_time += time.perf_counter() - start
+            features = compute_features(y).reshape(1, -1)
+            preds.append(int(np.argmax(model.predict_proba(features)[0])))
+            total_time += time.perf_counter() - start
+        results[res_type] = (decode_time, total_time, np.array(preds))
+
+    n = len(clips)
+    reference = results[DEFAULT_RESAMPLER][2]
+    print(f"clips: {n}  (buffer decode matches librosa.load)")
+    print(f"{'resampler':<13}{'decode ms':>10}{'total ms':>10}{'agree %':>9}{'acc %':>8}")
+    for res_type, (decode_time, total_time, preds) in results.items():
+        print(f"{res_type:<13}{1000 * decode_time / n:10.2f}{1000 * total_time / n:10.2f}"
+              f"{100 * np.mean(preds == reference):9.1f}{100 * np.mean(preds == labels):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Accuracy/latency with and without the energy-based cry segmenter.
+
+Runs every Sound_data clip through the /predict feature path twice, once on
+the whole recording (worker.extract_features) and once on the cry segments
+only (worker.extract_segmented_features), and reports latency, the share of
+audio analyzed, accuracy against the folder labels and agreement between the
+two. With --pad-seconds, each clip is also embedded in that much low-level
+background noise to show how both paths scale with recording length.
+
+Usage (from back_end/):
+    python benchmarks/segmentation.py [--data ../Sound_data] [--limit N] [--pad-seconds 60]
+"""
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from segmentation import CrySegmenter  # noqa: E402
+from worker import extract_features, extract_segmented_features  # noqa: E402
+
+MODEL_PATH = Path(__file__).resolve().parents[1] / "Model" / "saved_model" / "best_model.joblib"
+LABEL_DIRS = ["belly_pain", "burping", "discomfort", "hungry", "tired"]
+
+
+def padded_wav(data: bytes, pad_seconds: float, rng: np.random.Generator) -> bytes:
+    """The clip placed in the middle of ``pad_seconds`` of -50 dBFS noise."""
+    y, sr = sf.read(io.BytesIO(data), dtype="float32")
+    noise = rng.normal(0, 10 ** (-50 / 20), int(pad_seconds * sr)).astype(np.float32)
+    half = len(noise) // 2
+    out = io.BytesIO()
+    sf.write(out, np.concatenate((noise[:half], y, noise[half:])), sr, format="WAV")
+    return out.getvalue()
+
+
+def run(blobs, fn, *args):
+    """(features matrix, per-clip seconds, per-clip extras) for one extraction path."""
+    fn(blobs[0], "clip.wav", "kaiser_best", *args)  # warm-up
+    rows, times, extras = [], [], []
+    for data in blobs:
+        start = time.perf_counter()
+        result = fn(data, "clip.wav", "kaiser_best", *args)
+        times.append(time.perf_counter() - start)
+        if isinstance(result, tuple):
+            result, segments = result
+            extras.append(sum(end - start for start, end in segments))
+        rows.append(result)
+    return np.stack(rows), np.array(times) * 1000, extras
+
+
+def report(name, times, predictions, labels):
+    print(f"  {name:<10}latency mean {times.mean():7.1f} ms  p95 {np.percentile(times, 95):7.1f} ms  "
+          f"accuracy {np.mean(predictions == labels):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", type=Path,
+                        default=Path(__file__).resolve().parents[2] / "Sound_data")
+    parser.add_argument("--limit", type=int, default=None, help="only use every Nth clip to get N")
+    parser.add_argument("--pad-seconds", type=float, default=0.0,
+                        help="also test clips embedded in this much background noise")
+    parser.add_argument("--max-seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    clips = sorted(args.data.glob("*/*.wav"))
+    if not clips:
+        sys.exit(f"No .wav files found under {args.data}")
+    if args.limit:
+        clips = clips[::max(1, len(clips) // args.limit)][:args.limit]
+    labels = np.array([LABEL_DIRS.index(p.parent.name) for p in clips])
+    model = joblib.load(MODEL_PATH)
+    segmenter = CrySegmenter(max_seconds=args.max_seconds)
+
+    scenarios = [("original clips", [p.read_bytes() for p in clips])]
+    if args.pad_seconds:
+        rng = np.random.default_rng(0)
+        scenarios.append((f"clips in {args.pad_seconds:g} s of background noise",
+                          [padded_wav(p.read_bytes(), args.pad_seconds, rng) for p in clips]))
+
+    for title, blobs in scenarios:
+        durations = [sf.info(io.BytesIO(data)).duration for data in blobs]
+        full_X, full_times, _ = run(blobs, extract_features)
+        seg_X, seg_times, analyzed = run(blobs, extract_segmented_features, segmenter)
+        full_pred, seg_pred = model.predict(full_X), model.predict(seg_X)
+        print(f"{title} ({len(blobs)} clips, mean {np.mean(durations):.1f} s)")
+        report("full", full_times, full_pred, labels)
+        report("segmented", seg_times, seg_pred, labels)
+        print(f"  analyzed {np.sum(analyzed) / np.sum(durations):.0%} of the audio, "
+              f"speedup {full_times.mean() / seg_times.mean():.2f}x, "
+              f"agreement {np.mean(full_pred == seg_pred):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Load test for the /ws/stream endpoint.
+
+Replays Sound_data clips as live 16 kHz PCM streams against a running server,
+several at a time, and reports per-prediction latency (from sending the chunk
+that completed an emit interval to receiving its prediction), rejected
+connections, and how often the final stream prediction agrees with /predict
+on the same clip.
+
+Usage (from back_end/, with the API running on localhost:8000):
+    python benchmarks/stream_load.py [--streams 4] [--clips 20] [--realtime] [--compare]
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import sys
+import time
+from pathlib import Path
+
+import librosa
+import numpy as np
+import requests
+import websockets
+
+SAMPLE_RATE = 16000
+
+
+async def run_stream(url: str, path: Path, chunk_ms: int, realtime: bool, results: dict):
+    y = librosa.load(path, sr=SAMPLE_RATE)[0]
+    pcm = (np.clip(y, -1, 1) * 32767).astype("<i2")
+    chunk = int(SAMPLE_RATE * chunk_ms / 1000)
+    sent_at = []  # (samples sent so far, time) after each chunk
+    latencies = []
+    final = None
+
+    try:
+        async with websockets.connect(f"{url}?sample_format=s16", max_size=None) as ws:
+            async def send():
+                for start in range(0, len(pcm), chunk):
+                    await ws.send(pcm[start:start + chunk].tobytes())
+                    sent_at.append((min(start + chunk, len(pcm)), time.perf_counter()))
+                    if realtime:
+                        await asyncio.sleep(chunk_ms / 1000)
+                await ws.send("end")
+
+            sender = asyncio.create_task(send())
+            try:
+                async for message in ws:
+                    reply = json.loads(message)
+                    if reply.get("type") != "prediction":
+                        continue
+                    samples = int(round(reply["stream_seconds"] * SAMPLE_RATE))
+                    index = bisect.bisect_left([n for n, _ in sent_at], samples)
+                    if index < len(sent_at) and not reply["final"]:
+                        latencies.append(time.perf_counter() - sent_at[index][1])
+                    if reply["final"]:
+                        final = reply["predicted_label"]
+                await sender
+            finally:
+                sender.cancel()
+    except websockets.ConnectionClosedError as e:
+        if e.rcvd is not None and e.rcvd.code == 1013:
+            results["rejected"] += 1
+            return
+        raise
+
+    results["streams"] += 1
+    results["audio_seconds"] += len(y) / SAMPLE_RATE
+    results["latencies"].extend(latencies)
+    results["finals"][path] = final
+
+
+def predict_file(http_url: str, path: Path) -> str:
+    with open(path, "rb") as f:
+        response = requests.post(f"{http_url}/predict", files={"file": (path.name, f, "audio/wav")})
+    response.raise_for_status()
+    return response.json()["predicted_label"]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="ws://localhost:8000/ws/stream")
+    parser.add_argument("--data", type=Path,
+                        default=Path(__file__).resolve().parents[2] / "Sound_data")
+    parser.add_argument("--streams", type=int, default=4, help="concurrent connections")
+    parser.add_argument("--clips", type=int, default=20, help="clips to replay")
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    parser.add_argument("--realtime", action="store_true", help="pace chunks at audio speed")
+    parser.add_argument("--compare", action="store_true",
+                        help="compare final stream predictions with /predict")
+    args = parser.parse_args()
+
+    clips = sorted(args.data.glob("*/*.wav"))
+    if not clips:
+        sys.exit(f"No .wav files found under {args.data}")
+    clips = clips[::max(1, len(clips) // args.clips)][:args.clips]
+
+    results = {"streams": 0, "rejected": 0, "audio_seconds": 0.0, "latencies": [], "finals": {}}
+    gate = asyncio.Semaphore(args.streams)
+
+    async def guarded(path):
+        async with gate:
+            await run_stream(args.url, path, args.chunk_ms, args.realtime, results)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(guarded(path) for path in clips))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(results["latencies"]) * 1000
+    print(f"streams: {results['streams']} completed, {results['rejected']} rejected, "
+          f"{args.streams} concurrent, chunk {args.chunk_ms} ms, "
+          f"{'real-time' if args.realtime else 'as fast as possible'}")
+    print(f"audio: {results['audio_seconds']:.1f} s in {elapsed:.1f} s wall "
+          f"({results['audio_seconds'] / elapsed:.1f}x real time)")
+    if len(latencies):
+        print(f"prediction latency: p50 {np.percentile(latencies, 50):.1f} ms  "
+              f"p95 {np.percentile(latencies, 95):.1f} ms  max {latencies.max():.1f} ms  "
+              f"({len(latencies)} predictions)")
+
+    if args.compare and results["finals"]:
+        http_url = args.url.replace("ws://", "http://").replace("wss://", "https://")
+        http_url = http_url.rsplit("/ws/", 1)[0]
+        same = sum(predict_file(http_url, path) == label for path, label in results["finals"].items())
+        print(f"final stream prediction == /predict: {same}/{len(results['finals'])}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
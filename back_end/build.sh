@@ -5,4 +5,8 @@ set -o errexit
 pip install --upgrade pip
 
 # Install the rest from requirements
-pip install -r requirements.txt
\ No newline at end of file
+pip install -r requirements.txt
+
+# Compile librosa's cacheable numba kernels into NUMBA_CACHE_DIR
+# (.numba_cache by default) so the first start skips that work
+python -c "import main, worker; worker.warm_up(main.RESAMPLER)"
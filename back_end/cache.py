@@ -0,0 +1,233 @@
+# Content-addressed result cache
+#
+# Retried uploads are recognised by the hash of their bytes. Values live in a
+# bounded in-process LRU (byte budget + TTL) and, optionally, in an on-disk
+# tier that survives restarts. NumPy arrays are stored as .npy, everything
+# else as JSON, so nothing is ever unpickled from disk.
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_fingerprint(path: Path) -> str:
+    """Short content hash of a file, used to tie cache entries to a model."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _value_size(value: Any) -> int:
+    """Approximate memory held by a cached value, including what containers hold."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(_value_size(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(_value_size(k) + _value_size(v) for k, v in value.items())
+    return size
+
+
+class LRUCache:
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, size, expires = entry
+        if expires < time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any):
+        size = _value_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, size, time.monotonic() + self.ttl)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class DiskCache:
+    def __init__(self, directory: Path, max_bytes: int, ttl: float):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # put() runs in worker threads: the counter and the trim scan are locked
+        self._writes_since_trim = 0
+        self._count_lock = threading.Lock()
+        self._trim_lock = threading.Lock()
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}{suffix}"
+
+    def get(self, key: str) -> Optional[Any]:
+        for suffix in (".npy", ".json"):
+            path = self._path(key, suffix)
+            try:
+                if time.time() - path.stat().st_mtime > self.ttl:
+                    path.unlink(missing_ok=True)
+                    continue
+                if suffix == ".npy":
+                    value = np.load(path, allow_pickle=False)
+                else:
+                    value = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            self.hits += 1
+            return value
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Any):
+        is_array = isinstance(value, np.ndarray)
+        path = self._path(key, ".npy" if is_array else ".json")
+        # A unique temp file per write, so concurrent writes of one key don't
+        # clobber each other and readers only ever see complete files
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f"{path.name}.", suffix=".tmp")
+        except OSError as e:
+            logger.warning(f"Disk cache write failed for {path.name}: {e}")
+            return
+        try:
+            with os.fdopen(fd, "wb" if is_array else "w") as f:
+                if is_array:
+                    np.save(f, value, allow_pickle=False)
+                else:
+                    f.write(json.dumps(value))
+            os.replace(tmp, path)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Disk cache write failed for {path.name}: {e}")
+            Path(tmp).unlink(missing_ok=True)
+            return
+        with self._count_lock:
+            self._writes_since_trim += 1
+            due = self._writes_since_trim >= 100
+            if due:
+                self._writes_since_trim = 0
+        if due:
+            self.trim()
+
+    def trim(self):
+        """Delete expired files, then the oldest ones until under max_bytes."""
+        # One scan at a time; a write that comes due meanwhile skips its own
+        if not self._trim_lock.acquire(blocking=False):
+            return
+        try:
+            self._trim()
+        finally:
+            self._trim_lock.release()
+
+    def _trim(self):
+        now = time.time()
+        files = []
+        for path in self.directory.iterdir():
+            if path.suffix not in (".npy", ".json"):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                self.evictions += 1
+            else:
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        return {
+            "directory": str(self.directory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class TieredCache:
+    """Memory LRU in front of an optional disk tier; disk hits are promoted."""
+
+    def __init__(self, memory: LRUCache, disk: Optional[DiskCache] = None):
+        self.memory = memory
+        self.disk = disk
+
+    # The disk tier does file I/O (and a periodic directory scan), so it runs
+    # in a thread to keep the event loop free
+    async def get_async(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = await asyncio.to_thread(self.disk.get, key)
+            if value is not None:
+                self.memory.put(key, value)
+        return value
+
+    async def put_async(self, key: str, value: Any):
+        self.memory.put(key, value)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.put, key, value)
+
+    def stats(self) -> Dict:
+        stats = {"memory": self.memory.stats()}
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
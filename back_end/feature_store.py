@@ -0,0 +1,239 @@
+# Offline feature store for the Sound_data corpus
+#
+# Extracts features for every Sound_data/<label>/*.wav with the exact code
+# path used by /predict (worker.extract_features), in a process pool, and
+# stores them as a single .npy matrix plus a JSON manifest. Re-running only
+# processes files that were added or changed since the last build.
+#
+# Usage (from back_end/):
+#     python feature_store.py build [--data ../Sound_data] [--out feature_store]
+#     python feature_store.py evaluate [--out feature_store]
+#
+# Training code can load the matrix without copying it:
+#     from feature_store import load_feature_store
+#     X, labels, paths = load_feature_store("feature_store")
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from audio import DEFAULT_RESAMPLER, RESAMPLERS
+from features import EXTRACTOR_VERSION, FEATURE_DIM, SAMPLE_RATE
+from worker import FeatureExtractionError, extract_features
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_DATA_DIR = BASE_DIR.parent / "Sound_data"
+DEFAULT_STORE_DIR = BASE_DIR / "feature_store"
+MANIFEST_NAME = "manifest.json"
+FEATURES_NAME = "features.npy"
+FEATURE_DTYPE = np.float64
+# The model's classes, in the notebook's LabelEncoder order
+LABEL_DIRS = ["belly_pain", "burping", "discomfort", "hungry", "tired"]
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _extract_file(path: Path, res_type: str) -> Tuple[str, Optional[np.ndarray], Optional[str]]:
+    """Pool job: (sha256, features or None, error or None) for one clip."""
+    data = path.read_bytes()
+    try:
+        return _sha256(data), extract_features(data, path.name, res_type), None
+    except FeatureExtractionError as e:
+        return _sha256(data), None, str(e)
+
+
+def _read_manifest(store_dir: Path) -> Optional[Dict]:
+    try:
+        return json.loads((store_dir / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _matrix_checksum(matrix: np.ndarray) -> str:
+    # Hashes the (memory-mapped) buffer in place rather than a copy of it
+    return hashlib.sha256(memoryview(np.ascontiguousarray(matrix))).hexdigest()
+
+
+def _load_matrix(store_dir: Path, manifest: Dict) -> Optional[np.ndarray]:
+    """Memory-mapped matrix, or None if it is missing or doesn't belong to ``manifest``.
+
+    The matrix and manifest are replaced one after the other, so a crash in
+    between leaves a matrix that no longer matches; the row count and
+    checksum recorded in the manifest catch that.
+    """
+    try:
+        X = np.load(store_dir / FEATURES_NAME, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if X.shape != (len(manifest["files"]), FEATURE_DIM) or X.shape[0] != manifest.get("rows"):
+        return None
+    if _matrix_checksum(X) != manifest.get("checksum"):
+        return None
+    return X
+
+
+def _store_settings(res_type: str) -> Dict:
+    return {
+        "extractor_version": EXTRACTOR_VERSION,
+        "resampler": res_type,
+        "sample_rate": SAMPLE_RATE,
+        "feature_dim": FEATURE_DIM,
+        "dtype": np.dtype(FEATURE_DTYPE).name,
+    }
+
+
+def build_feature_store(data_dir: Path = DEFAULT_DATA_DIR, store_dir: Path = DEFAULT_STORE_DIR,
+                        workers: Optional[int] = None, res_type: str = DEFAULT_RESAMPLER,
+                        full: bool = False) -> Dict:
+    """Bring the store in ``store_dir`` up to date with ``data_dir``; returns build stats."""
+    start = time.perf_counter()
+    data_dir, store_dir = Path(data_dir), Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    settings = _store_settings(res_type)
+
+    # Rows from a previous build can be reused only if they were made the same way
+    manifest = None if full else _read_manifest(store_dir)
+    if manifest is not None and any(manifest.get(k) != v for k, v in settings.items()):
+        logger.info("Feature store settings changed, rebuilding from scratch")
+        manifest = None
+    old_features = _load_matrix(store_dir, manifest) if manifest else None
+    if manifest and old_features is None:
+        logger.warning("Feature matrix is missing or doesn't match the manifest, rebuilding from scratch")
+        manifest = None
+    previous = {entry["path"]: (row, entry) for row, entry in enumerate(manifest["files"])} \
+        if manifest else {}
+
+    entries: List[Dict] = []
+    sources: List[Optional[int]] = []  # old row index, or None when extracted below
+    pending: List[Tuple[int, Path]] = []
+    for path in sorted(data_dir.glob("*/*.wav")):
+        rel = path.relative_to(data_dir).as_posix()
+        stat = path.stat()
+        entry = {"path": rel, "label": path.parent.name,
+                 "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": None}
+        old_row, old_entry = previous.get(rel, (None, None))
+        if old_entry is not None:
+            if (old_entry["size"], old_entry["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+                entry["sha256"] = old_entry["sha256"]
+            else:
+                # Touched but possibly identical: compare content before re-extracting
+                entry["sha256"] = _sha256(path.read_bytes())
+                if entry["sha256"] != old_entry["sha256"]:
+                    old_row = None
+        if old_row is None:
+            pending.append((len(entries), path))
+        entries.append(entry)
+        sources.append(old_row)
+
+    failed = []
+    extracted = {}
+    if pending:
+        workers = workers or os.cpu_count() or 1
+        logger.info(f"Extracting {len(pending)} file(s) with {workers} worker(s)")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            jobs = executor.map(_extract_file, [path for _, path in pending],
+                                [res_type] * len(pending), chunksize=4)
+            for (index, path), (digest, features, error) in zip(pending, jobs):
+                entries[index]["sha256"] = digest
+                if features is None:
+                    logger.warning(f"Skipping {path}: {error}")
+                    failed.append(index)
+                else:
+                    extracted[index] = features
+
+    # Write the new matrix next to the old one, then swap both files in
+    failed_set = set(failed)
+    keep = [i for i in range(len(entries)) if i not in failed_set]
+    tmp_features = store_dir / f"{FEATURES_NAME}.tmp"
+    matrix = np.lib.format.open_memmap(tmp_features, mode="w+", dtype=FEATURE_DTYPE,
+                                       shape=(len(keep), FEATURE_DIM))
+    for row, index in enumerate(keep):
+        matrix[row] = extracted[index] if sources[index] is None else old_features[sources[index]]
+    matrix.flush()
+    checksum = _matrix_checksum(matrix)
+    del matrix, old_features
+    os.replace(tmp_features, store_dir / FEATURES_NAME)
+
+    tmp_manifest = store_dir / f"{MANIFEST_NAME}.tmp"
+    tmp_manifest.write_text(json.dumps({**settings, "rows": len(keep), "checksum": checksum,
+                                        "files": [entries[i] for i in keep]}, indent=1))
+    os.replace(tmp_manifest, store_dir / MANIFEST_NAME)
+
+    stats = {
+        "files": len(keep),
+        "reused": sum(source is not None for source in sources),
+        "extracted": len(extracted),
+        "failed": len(failed),
+        "removed": len(set(previous) - {entry["path"] for entry in entries}),
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+    logger.info(f"Feature store updated: {stats}")
+    return stats
+
+
+def load_feature_store(store_dir: Path = DEFAULT_STORE_DIR) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """Return (X, labels, paths); X is a read-only memory map of the stored matrix."""
+    store_dir = Path(store_dir)
+    manifest = _read_manifest(store_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No feature store manifest in {store_dir}")
+    if manifest["extractor_version"] != EXTRACTOR_VERSION:
+        raise ValueError(f"Feature store was built with extractor version "
+                         f"{manifest['extractor_version']}, current is {EXTRACTOR_VERSION}")
+    X = _load_matrix(store_dir, manifest)
+    if X is None:
+        raise ValueError(f"Feature matrix in {store_dir} is missing or doesn't match its "
+                         f"manifest; run `python feature_store.py build`")
+    labels = np.array([entry["label"] for entry in manifest["files"]])
+    paths = [entry["path"] for entry in manifest["files"]]
+    return X, labels, paths
+
+
+def evaluate_feature_store(store_dir: Path = DEFAULT_STORE_DIR):
+    """Score the serving model on the stored features, per label."""
+    import joblib
+    from inference import compile_model
+
+    X, labels, _ = load_feature_store(store_dir)
+    model = joblib.load(BASE_DIR / "Model" / "saved_model" / "best_model.joblib")
+    predictor = compile_model(model) or model
+    predicted = np.array(LABEL_DIRS)[predictor.predict(X)]
+    print(f"accuracy: {np.mean(predicted == labels):.3f} on {len(labels)} clips")
+    for name in sorted(set(labels)):
+        mask = labels == name
+        print(f"  {name:<12}{np.mean(predicted[mask] == name):.3f}  ({mask.sum()} clips)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline feature store for Sound_data")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="extract features for new or changed clips")
+    build.add_argument("--data", type=Path, default=DEFAULT_DATA_DIR)
+    build.add_argument("--out", type=Path, default=DEFAULT_STORE_DIR)
+    build.add_argument("--workers", type=int, default=None)
+    build.add_argument("--resampler", choices=RESAMPLERS, default=DEFAULT_RESAMPLER)
+    build.add_argument("--full", action="store_true", help="ignore the existing store")
+    evaluate = sub.add_parser("evaluate", help="score the serving model on the store")
+    evaluate.add_argument("--out", type=Path, default=DEFAULT_STORE_DIR)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_feature_store(args.data, args.out, args.workers, args.resampler, args.full)
+    else:
+        evaluate_feature_store(args.out)
+
+
+if __name__ == "__main__":
+    main()
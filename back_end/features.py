@@ -0,0 +1,125 @@
+# Shared-spectrogram feature engine
+#
+# Produces the same feature vector the notebook was trained on
+# (mfcc | chroma | mel | contrast | tonnetz), but computes each spectral
+# representation once and derives every feature family from it:
+#   - one power STFT (n_fft=1024, 10 ms hop, 25 ms window) -> mel -> mfcc
+#   - one magnitude STFT (librosa defaults) -> chroma + contrast
+#   - one piptrack pass on that STFT -> tuning for chroma_stft and the CQT
+#   - one CQT chroma -> tonnetz
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import librosa
+import numpy as np
+
+# FEATURE CONFIGURATION
+SAMPLE_RATE = 16000
+N_MFCC = 40
+N_FFT = 1024
+HOP_LENGTH = 10 * 16
+WIN_LENGTH = 25 * 16
+WINDOW = 'hann'
+N_MELS = 128
+N_BANDS = 7
+FMIN = 100
+
+# Defaults librosa uses for chroma_stft/spectral_contrast(S=...) and chroma_cqt
+CHROMA_N_FFT = 2048
+CHROMA_HOP_LENGTH = 512
+N_CHROMA = 12
+CQT_BINS_PER_OCTAVE = 36
+
+# mfcc(40) + chroma(12) + mel(128) + contrast(n_bands + 1) + tonnetz(6)
+FEATURE_DIM = N_MFCC + N_CHROMA + N_MELS + (N_BANDS + 1) + 6
+
+# Bump whenever the feature layout or numerics change; stored features
+# computed by another version are recomputed
+EXTRACTOR_VERSION = "1"
+
+
+@lru_cache(maxsize=8)
+def mel_basis(sr: int) -> np.ndarray:
+    """Mel filterbank for the power STFT, cached per sample rate."""
+    return librosa.filters.mel(sr=sr, n_fft=N_FFT, n_mels=N_MELS)
+
+
+def _tuning_from_pitches(pitch: np.ndarray, mag: np.ndarray, bins_per_octave: int) -> float:
+    """Same reduction as librosa.estimate_tuning, on a precomputed piptrack."""
+    pitch_mask = pitch > 0
+    threshold = np.median(mag[pitch_mask]) if pitch_mask.any() else 0.0
+    return librosa.pitch_tuning(
+        pitch[(mag >= threshold) & pitch_mask],
+        resolution=0.01,
+        bins_per_octave=bins_per_octave,
+    )
+
+
+def estimate_tunings(stft: np.ndarray, sr: int = SAMPLE_RATE) -> Tuple[float, float]:
+    """Tuning for chroma_stft and for the CQT from one piptrack pass over ``stft``."""
+    pitch, mag = librosa.piptrack(S=stft, sr=sr, n_fft=CHROMA_N_FFT)
+    return (_tuning_from_pitches(pitch, mag, N_CHROMA),
+            _tuning_from_pitches(pitch, mag, CQT_BINS_PER_OCTAVE))
+
+
+class StageTimer:
+    """Accumulates wall-clock seconds per stage into ``timings`` (a no-op when None)."""
+
+    def __init__(self, timings: Optional[Dict[str, float]]):
+        self.timings = timings
+        self.last = time.perf_counter()
+
+    def mark(self, stage: str):
+        if self.timings is None:
+            return
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + (now - self.last)
+        self.last = now
+
+
+def compute_features(y: np.ndarray, sr: int = SAMPLE_RATE,
+                     timings: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Return the 1-D feature vector for a mono clip.
+
+    If ``timings`` is given, per-stage wall-clock seconds are accumulated into it.
+    """
+    timer = StageTimer(timings)
+
+    # Mel power spectrogram shared by mel and mfcc
+    power = np.abs(librosa.stft(
+        y, n_fft=N_FFT, hop_length=HOP_LENGTH,
+        win_length=WIN_LENGTH, window=WINDOW
+    )) ** 2
+    mel_spec = np.einsum("...ft,mf->...mt", power, mel_basis(sr), optimize=True)
+    timer.mark("mel")
+
+    mfcc = np.mean(librosa.feature.mfcc(
+        S=librosa.power_to_db(mel_spec), n_mfcc=N_MFCC
+    ), axis=1)
+    mel = np.mean(mel_spec, axis=1)
+    timer.mark("mfcc")
+
+    # Magnitude spectrogram shared by chroma, contrast and tuning estimation
+    stft = np.abs(librosa.stft(y, n_fft=CHROMA_N_FFT, hop_length=CHROMA_HOP_LENGTH))
+    chroma_tuning, cqt_tuning = estimate_tunings(stft, sr)
+    timer.mark("stft")
+
+    chroma = np.mean(librosa.feature.chroma_stft(
+        S=stft, sr=sr, tuning=chroma_tuning
+    ), axis=1)
+    timer.mark("chroma")
+
+    contrast = np.mean(librosa.feature.spectral_contrast(
+        S=stft, sr=sr, n_bands=N_BANDS, fmin=FMIN
+    ), axis=1)
+    timer.mark("contrast")
+
+    chroma_cq = librosa.feature.chroma_cqt(
+        y=y, sr=sr, hop_length=CHROMA_HOP_LENGTH,
+        tuning=cqt_tuning
+    )
+    tonnetz = np.mean(librosa.feature.tonnetz(sr=sr, chroma=chroma_cq), axis=1)
+    timer.mark("tonnetz")
+
+    return np.concatenate((mfcc, chroma, mel, contrast, tonnetz))
@@ -0,0 +1,126 @@
+# Batched inference
+#
+# CompiledTree flattens a fitted sklearn decision tree into NumPy node arrays
+# and walks every row of a batch at once, one tree level per step. It
+# reproduces sklearn's predict/predict_proba exactly (float32 inputs compared
+# against float64 thresholds, same NaN routing, same normalisation).
+#
+# MicroBatcher coalesces rows submitted by concurrent requests within a short
+# window and scores them in a single vectorized call.
+import asyncio
+import logging
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from sklearn.base import is_classifier
+from sklearn.tree import BaseDecisionTree
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledTree:
+    def __init__(self, estimator: BaseDecisionTree):
+        tree = estimator.tree_
+        self.is_leaf = tree.children_left == -1
+        # Leaves point back at themselves so rows that reach one stay put
+        nodes = np.arange(tree.node_count, dtype=np.intp)
+        self.left = np.where(self.is_leaf, nodes, tree.children_left).astype(np.intp)
+        self.right = np.where(self.is_leaf, nodes, tree.children_right).astype(np.intp)
+        self.feature = np.where(self.is_leaf, 0, tree.feature).astype(np.intp)
+        self.threshold = tree.threshold.astype(np.float64)
+        missing = getattr(tree, "missing_go_to_left", None)
+        self.missing_left = (np.zeros(tree.node_count, dtype=bool) if missing is None
+                             else missing.astype(bool))
+        self.max_depth = tree.max_depth
+        self.n_features = estimator.n_features_in_
+        self.classifier = is_classifier(estimator)
+
+        if self.classifier:
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :estimator.n_classes_]
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            self.leaf_output = value / normalizer
+            self.classes = estimator.classes_
+        else:
+            self.leaf_output = tree.value[:, 0, 0]
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf index for every row of ``X``."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input of shape (n, {self.n_features}), got {X.shape}")
+        has_nan = np.isnan(X).any()
+        rows = np.arange(X.shape[0])
+        node = np.zeros(X.shape[0], dtype=np.intp)
+        for _ in range(self.max_depth):
+            # float32 values compared against float64 thresholds, as in sklearn
+            value = X[rows, self.feature[node]]
+            go_left = value <= self.threshold[node]
+            if has_nan:
+                go_left = np.where(np.isnan(value), self.missing_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+            if self.is_leaf[node].all():
+                break
+        return node
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self.leaf_output[self.apply(X)]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        output = self.leaf_output[self.apply(X)]
+        if self.classifier:
+            return self.classes.take(np.argmax(output, axis=1), axis=0)
+        return output
+
+
+def compile_model(model) -> Optional[CompiledTree]:
+    """CompiledTree for single-output sklearn decision trees, else None."""
+    if isinstance(model, BaseDecisionTree) and model.n_outputs_ == 1:
+        return CompiledTree(model)
+    return None
+
+
+class MicroBatcher:
+    """Collects rows for up to ``window`` seconds (or ``max_batch`` rows) and
+    scores them with one ``predict_fn`` call. ``predict_fn`` maps an (n, d)
+    matrix to an array whose first axis has length n.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], np.ndarray],
+                 window: float, max_batch: int):
+        self.predict_fn = predict_fn
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self._pending: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def submit(self, features: np.ndarray) -> np.ndarray:
+        """Score one 1-D feature vector; returns its row of model output."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((features, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            outputs = self.predict_fn(np.stack([features for features, _ in batch]))
+        except Exception as e:
+            logger.error(f"Batch inference error: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), output in zip(batch, outputs):
+            if not future.done():
+                future.set_result(output)
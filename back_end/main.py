@@ -1,18 +1,41 @@
 # Essential imports
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
+import time
+import_start = time.perf_counter()
+import os
+from functools import partial
+from pathlib import Path
+
+# librosa's numba kernels are compiled on first use; keep the on-disk part of
+# that cache in a directory that survives restarts (and can be baked into the
+# image by build.sh). Must be set before numba is imported.
+os.environ.setdefault("NUMBA_CACHE_DIR", str(Path(__file__).resolve().parent / ".numba_cache"))
+
+from fastapi import FastAPI, File, UploadFile, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
-import uvicorn
-import librosa
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import joblib
-import os
-from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import logging
 
+from audio import DEFAULT_RESAMPLER, RESAMPLERS
+from cache import DiskCache, LRUCache, TieredCache, content_hash, file_fingerprint
+from inference import MicroBatcher, compile_model
+from features import EXTRACTOR_VERSION, SAMPLE_RATE
+from metrics import CONTENT_TYPE, Counter, Gauge, Histogram, MetricsRegistry
+from segmentation import CrySegmenter
+from streaming import StreamingFeatures
+from worker import (
+    FeatureExtractionError, InferencePool, PoolSaturated, extract_features,
+    extract_segmented_features, timed, warm_up,
+)
+
+import_seconds = time.perf_counter() - import_start
+
 # LOGGING CONFIGURATION
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,15 +62,138 @@ app.add_middleware(
 BASE_DIR = Path(__file__).resolve().parent
 MODEL_DIR = BASE_DIR / "Model" / "saved_model"
 MODEL_PATH = MODEL_DIR / "best_model.joblib"
-TEMP_DIR = BASE_DIR / "temp"
 
 MODEL_DIR.mkdir(parents=True, exist_ok=True)
-TEMP_DIR.mkdir(exist_ok=True)
+
+# AUDIO SETTINGS
+# kaiser_best matches training; polyphase is much cheaper for 8k -> 16k uploads
+RESAMPLER = os.getenv("RESAMPLER", DEFAULT_RESAMPLER)
+if RESAMPLER not in RESAMPLERS:
+    raise ValueError(f"RESAMPLER must be one of {RESAMPLERS}, got '{RESAMPLER}'")
+
+# SEGMENTATION SETTINGS
+# With SEGMENTATION=1 only the loud (cry) regions of an upload are analyzed,
+# at most SEGMENT_MAX_SECONDS of them, so long or mostly silent recordings
+# cost about as much as a short clip
+SEGMENTATION = os.getenv("SEGMENTATION", "0") == "1"
+segmenter = CrySegmenter(
+    threshold_db=float(os.getenv("SEGMENT_THRESHOLD_DB", -30)),
+    max_seconds=float(os.getenv("SEGMENT_MAX_SECONDS", 10))
+) if SEGMENTATION else None
+
+# WORKER POOL SETTINGS
+# "process" uses every core; "thread" shares one interpreter (librosa/numpy
+# release the GIL in their heavy kernels)
+WORKER_MODE = os.getenv("WORKER_MODE", "process")
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", os.cpu_count() or 1))
+QUEUE_SIZE = int(os.getenv("QUEUE_SIZE", 2 * WORKER_COUNT))
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", 30))
+DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", 30))
+RETRY_AFTER = os.getenv("RETRY_AFTER", "2")
+
+# BATCHING SETTINGS
+# Concurrent requests arriving within BATCH_WINDOW_MS are scored together
+BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", 5))
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 32))
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", 16))
+MAX_FILE_SIZE = 10 * 1024 * 1024
+
+# STREAMING SETTINGS
+# /ws/stream takes mono 16 kHz PCM and emits a prediction for the last
+# STREAM_WINDOW_SECONDS of audio every STREAM_EMIT_MS of audio received
+STREAM_WINDOW_SECONDS = float(os.getenv("STREAM_WINDOW_SECONDS", 5))
+STREAM_EMIT_MS = float(os.getenv("STREAM_EMIT_MS", 500))
+MAX_STREAMS = int(os.getenv("MAX_STREAMS", 8))
+# Stream featurization runs on its own bounded thread pool, so streams can't
+# starve the default executor; each stream has at most one update in flight
+STREAM_WORKERS = int(os.getenv("STREAM_WORKERS", min(MAX_STREAMS, WORKER_COUNT)))
+MAX_STREAM_CHUNK = 2 * 16000 * 4  # two seconds of float32 samples
+STREAM_FORMATS = {"s16": np.int16, "f32": np.float32}
+
+# CACHE SETTINGS
+# Set CACHE_MAX_BYTES=0 to disable; set CACHE_DIR to keep results across restarts
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+CACHE_TTL = float(os.getenv("CACHE_TTL", 24 * 3600))
+CACHE_DIR = os.getenv("CACHE_DIR")
+CACHE_DISK_MAX_BYTES = int(os.getenv("CACHE_DISK_MAX_BYTES", 512 * 1024 * 1024))
+
+# WARM-UP SETTINGS
+# Run the full feature + inference path on a synthetic clip in every worker
+# before serving, so the first real request doesn't pay for JIT compilation
+WARM_UP = os.getenv("WARM_UP", "1") == "1"
+
+# METRICS SETTINGS
+# Per-stage latency histograms, queue depth and error counts on /metrics
+# (Prometheus text format). METRICS=0 removes the endpoint and every timer.
+METRICS = os.getenv("METRICS", "1") == "1"
 
 # GLOBAL VARIABLES
+pool = InferencePool(WORKER_MODE, WORKER_COUNT, QUEUE_SIZE, REQUEST_TIMEOUT)
+stream_executor = ThreadPoolExecutor(max_workers=STREAM_WORKERS, thread_name_prefix="stream")
 model = None
+compiled_model = None
 model_type = None
 model_metadata = {}
+model_fingerprint = None
+model_file_stat = None
+batcher = None
+ready = False
+cold_start = {"imports": round(import_seconds, 3)}
+result_cache = TieredCache(
+    LRUCache(CACHE_MAX_BYTES, CACHE_TTL),
+    DiskCache(Path(CACHE_DIR), CACHE_DISK_MAX_BYTES, CACHE_TTL) if CACHE_DIR else None
+)
+
+# METRICS
+registry = MetricsRegistry()
+stage_seconds = registry.register(Histogram(
+    "neoparental_stage_duration_seconds",
+    "Time spent in each processing stage (queue = pool wait and transfer).",
+    ["stage"]
+))
+request_seconds = registry.register(Histogram(
+    "neoparental_request_duration_seconds",
+    "End-to-end latency of successful requests.",
+    ["endpoint"]
+))
+batch_size = registry.register(Histogram(
+    "neoparental_inference_batch_size",
+    "Rows scored per batched model call.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+))
+errors = registry.register(Counter(
+    "neoparental_errors_total",
+    "Failed requests by endpoint and kind.",
+    ["endpoint", "kind"]
+))
+registry.register(Gauge(
+    "neoparental_queue_depth",
+    "Extraction jobs admitted to the worker pool and not yet finished.",
+    lambda: pool.depth
+))
+registry.register(Gauge(
+    "neoparental_queue_capacity",
+    "Jobs the worker pool admits before rejecting with 503.",
+    lambda: pool.capacity
+))
+registry.register(Gauge(
+    "neoparental_active_streams",
+    "Open /ws/stream connections.",
+    lambda: active_streams
+))
+registry.register(Gauge(
+    "neoparental_ready",
+    "1 once the model is loaded and workers are warmed up.",
+    lambda: int(is_ready())
+))
+
+def is_ready() -> bool:
+    """Warmed up, and the worker pool is accepting work (not draining or rebuilding)."""
+    return ready and pool.available
+
+def record_error(endpoint: str, kind: str):
+    if METRICS:
+        errors.inc(endpoint, kind)
 
 # CLASS LABELS
 class_labels = {
@@ -59,116 +205,283 @@ class_labels = {
 }
 
 # RESPONSE MODELS
+class AudioSegment(BaseModel):
+    start: float
+    end: float
+
 class PredictionResponse(BaseModel):
     prediction_value: float
     predicted_label: Optional[str]
     confidence: Optional[float]
     processing_time: float
     timestamp: str
+    cached: bool = False
+    segments: Optional[List[AudioSegment]] = None
+
+class BatchPredictionItem(BaseModel):
+    filename: str
+    prediction_value: Optional[float] = None
+    predicted_label: Optional[str] = None
+    confidence: Optional[float] = None
+    segments: Optional[List[AudioSegment]] = None
+    error: Optional[str] = None
+
+class BatchPredictionResponse(BaseModel):
+    results: List[BatchPredictionItem]
+    processing_time: float
+    timestamp: str
 
 class HealthResponse(BaseModel):
     status: str
+    ready: bool
     model_loaded: bool
     model_type: Optional[str]
     model_metadata: Dict
+    cache: Dict
+    cold_start: Dict
     timestamp: str
 
 # MODEL LOADING
-def load_model():
-    global model, model_type, model_metadata
+def read_model():
+    """Load the model file and everything derived from it; returns None if it doesn't exist.
+
+    Runs in a thread: joblib.load and the fingerprint read the whole file.
+    """
+    if not MODEL_PATH.exists():
+        return None
+    logger.info(f"Loading model from: {MODEL_PATH}")
+    stat = MODEL_PATH.stat()
+    loaded = joblib.load(MODEL_PATH)
+
+    # Detect model type dynamically
+    model_class_name = loaded.__class__.__name__
+    if "Classifier" in model_class_name:
+        loaded_type = "classifier"
+    else:
+        loaded_type = "regressor"
+
+    # Cached predictions are keyed on this, so a new model file
+    # never serves results computed by the old one
+    fingerprint = file_fingerprint(MODEL_PATH)
+
+    # Flat-array form of the tree for batched inference
+    compiled = compile_model(loaded)
+
+    metadata = {
+        "type": loaded_type,
+        "class": model_class_name,
+        "path": str(MODEL_PATH),
+        "library": "scikit-learn",
+        "compiled": compiled is not None,
+        "fingerprint": fingerprint
+    }
+    return loaded, compiled, loaded_type, metadata, fingerprint, (stat.st_mtime_ns, stat.st_size)
+
+async def load_model():
+    global model, compiled_model, model_type, model_metadata, model_fingerprint, model_file_stat, batcher
     try:
-        if MODEL_PATH.exists():
-            logger.info(f"Loading model from: {MODEL_PATH}")
-            model = joblib.load(MODEL_PATH)
-
-            # Detect model type dynamically
-            model_class_name = model.__class__.__name__
-            if "Classifier" in model_class_name:
-                model_type = "classifier"
-            else:
-                model_type = "regressor"
-
-            model_metadata = {
-                "type": model_type,
-                "class": model_class_name,
-                "path": str(MODEL_PATH),
-                "library": "scikit-learn"
-            }
-            logger.info(f"Model loaded successfully: {model_class_name}")
-        else:
-            logger.error("No model file found in Model/saved_model/")
-            model_metadata = {"error": "Model file not found"}
+        state = await asyncio.to_thread(read_model)
     except Exception as e:
         logger.error(f"Model loading error: {e}")
         model_metadata = {"error": str(e)}
         raise
-
-# FEATURE EXTRACTION
-def extract_audio_features(file_path: Path) -> np.ndarray:
-    try:
-        n_mfcc = 40
-        n_fft = 1024
-        hop_length = 10 * 16
-        win_length = 25 * 16
-        window = 'hann'
-        n_mels = 128
-        n_bands = 7
-        fmin = 100
-
-        y, sr = librosa.load(file_path, sr=16000)
-
-        mfcc = np.mean(librosa.feature.mfcc(
-            y=y, sr=sr, n_mfcc=n_mfcc, n_fft=n_fft,
-            hop_length=hop_length, win_length=win_length,
-            window=window
-        ).T, axis=0)
-
-        mel = np.mean(librosa.feature.melspectrogram(
-            y=y, sr=sr, n_fft=n_fft, hop_length=hop_length,
-            win_length=win_length, window='hann', n_mels=n_mels
-        ).T, axis=0)
-
-        stft = np.abs(librosa.stft(y))
-        chroma = np.mean(librosa.feature.chroma_stft(S=stft, y=y, sr=sr).T, axis=0)
-        contrast = np.mean(librosa.feature.spectral_contrast(
-            S=stft, y=y, sr=sr, n_fft=n_fft, hop_length=hop_length,
-            win_length=win_length, n_bands=n_bands, fmin=fmin
-        ).T, axis=0)
-        tonnetz = np.mean(librosa.feature.tonnetz(y=y, sr=sr).T, axis=0)
-
-        features = np.concatenate((mfcc, chroma, mel, contrast, tonnetz))
-        return features.reshape(1, -1)
-    except Exception as e:
-        logger.error(f"Feature extraction error: {e}")
-        raise HTTPException(status_code=400, detail=f"Feature extraction failed: {e}")
-
-# FILE VALIDATION & CLEANUP
+    if state is None:
+        logger.error("No model file found in Model/saved_model/")
+        model_metadata = {"error": "Model file not found"}
+        return
+    # Swapped in on the event loop in one step, so no request sees a mix
+    model, compiled_model, model_type, model_metadata, model_fingerprint, model_file_stat = state
+    batcher = make_batcher(compiled_model if compiled_model is not None else model, model_type)
+    logger.info(f"Model loaded successfully: {model_metadata['class']}")
+
+model_reload_lock = asyncio.Lock()
+
+async def reload_model_if_changed():
+    """Reload the model when the file on disk changes.
+
+    Cached predictions are keyed on the model fingerprint and cached features
+    don't depend on the model, so the cache is left alone.
+    """
+    async with model_reload_lock:
+        # Checked under the lock so concurrent requests trigger one reload
+        try:
+            stat = MODEL_PATH.stat()
+        except OSError:
+            return
+        if model_file_stat is None or (stat.st_mtime_ns, stat.st_size) == model_file_stat:
+            return
+        logger.info("Model file changed on disk, reloading")
+        try:
+            await load_model()
+        except Exception:
+            # Keep serving the previous model; retry on the next request
+            return
+
+# FILE VALIDATION
 def validate_audio_file(file: UploadFile) -> bool:
     allowed_extensions = {'.wav', '.mp3', '.m4a', '.flac', '.ogg', '.aac'}
     return Path(file.filename).suffix.lower() in allowed_extensions
 
-async def cleanup_file(file_path: Path):
-    try:
-        if file_path.exists():
-            file_path.unlink()
-            logger.debug(f"Cleaned up file: {file_path}")
-    except Exception as e:
-        logger.warning(f"Failed to delete {file_path}: {e}")
+# INFERENCE
+def predict_rows(predictor, predictor_type: str, features: np.ndarray) -> np.ndarray:
+    if predictor_type == "classifier":
+        return predictor.predict_proba(features)
+    return predictor.predict(features)
+
+def observed_predict_rows(predictor, predictor_type: str, features: np.ndarray) -> np.ndarray:
+    start = time.perf_counter()
+    output = predict_rows(predictor, predictor_type, features)
+    stage_seconds.observe(time.perf_counter() - start, "predict")
+    batch_size.observe(len(features))
+    return output
+
+def make_batcher(predictor, predictor_type: str) -> MicroBatcher:
+    """Batcher bound to one loaded model.
+
+    Every model load gets its own, so rows queued before a reload are still
+    scored by the model their request started with.
+    """
+    predict_fn = observed_predict_rows if METRICS else predict_rows
+    return MicroBatcher(partial(predict_fn, predictor, predictor_type),
+                        BATCH_WINDOW_MS / 1000, MAX_BATCH_SIZE)
+
+def format_prediction(output: np.ndarray, predictor_type: str) -> Tuple[float, Optional[str], float]:
+    """Map one row of model output to (prediction_value, label, confidence %)."""
+    if predictor_type == "classifier":
+        pred_index = int(np.argmax(output))
+        confidence = float(np.max(output))
+        prediction_value = pred_index
+        predicted_label = class_labels.get(pred_index, None)
+
+    else:  # Regressor
+        prediction_value = float(output)
+        predicted_label = class_labels.get(round(prediction_value), None)
+        # Simulate confidence based on proximity to integer class
+        confidence = max(0.0, 1.0 - abs(prediction_value - round(prediction_value)))
+
+    return prediction_value, predicted_label, round(confidence * 100, 2)
+
+async def run_extraction(fn, *args):
+    """Run an extraction job on the pool, recording its stage timings when metrics are on."""
+    if not METRICS:
+        return await pool.submit(fn, *args)
+    start = time.perf_counter()
+    result, timings = await pool.submit(timed, fn, *args)
+    for stage, seconds in timings.items():
+        stage_seconds.observe(seconds, stage)
+    stage_seconds.observe(max(0.0, time.perf_counter() - start - sum(timings.values())), "queue")
+    return result
+
+async def read_upload(file: UploadFile) -> bytes:
+    if not METRICS:
+        return await file.read()
+    start = time.perf_counter()
+    contents = await file.read()
+    stage_seconds.observe(time.perf_counter() - start, "upload_read")
+    return contents
+
+async def predict_contents(contents: bytes, filename: str):
+    """Return ((prediction_value, label, confidence %), segments, cached).
+
+    ``segments`` lists the analyzed (start, end) seconds, or is None when
+    segmentation is off.
+    """
+    # One model for the whole request, so the prediction is cached under
+    # the fingerprint of the model that made it, even if a reload lands
+    scorer, scorer_type, fingerprint = batcher, model_type, model_fingerprint
+
+    # Features depend only on the audio, extractor, decoder and segmenter;
+    # predictions also on the model
+    digest = await asyncio.to_thread(content_hash, contents)
+    features_key = f"features:{digest}:v{EXTRACTOR_VERSION}:{RESAMPLER}"
+    if segmenter is not None:
+        features_key += f":{segmenter.key}"
+    segments_key = f"segments:{features_key}"
+    prediction_key = f"prediction:{features_key}:{fingerprint}"
+
+    segments = await result_cache.get_async(segments_key) if segmenter is not None else None
+    segments_known = segmenter is None or segments is not None
+
+    prediction = await result_cache.get_async(prediction_key)
+    if prediction is not None and segments_known:
+        return tuple(prediction), segments, True
+
+    features = await result_cache.get_async(features_key)
+    if features is None or not segments_known:
+        if segmenter is None:
+            features = await run_extraction(extract_features, contents, filename, RESAMPLER)
+        else:
+            features, segments = await run_extraction(
+                extract_segmented_features, contents, filename, RESAMPLER, segmenter
+            )
+            await result_cache.put_async(segments_key, segments)
+        await result_cache.put_async(features_key, features)
+
+    prediction = format_prediction(await scorer.submit(features), scorer_type)
+    await result_cache.put_async(prediction_key, prediction)
+    return prediction, segments, False
+
+def segment_models(segments) -> Optional[List[AudioSegment]]:
+    if segments is None:
+        return None
+    return [AudioSegment(start=start, end=end) for start, end in segments]
+
+# WARM-UP
+async def warm_up_workers():
+    """Compile every worker's lazy kernels on a synthetic clip; records timings in cold_start."""
+    start = time.perf_counter()
+    # This process first: streams are featurized here, and forked pool
+    # workers inherit the kernels it has already compiled
+    features = await asyncio.to_thread(warm_up, RESAMPLER, segmenter)
+    cold_start["first_extraction"] = round(time.perf_counter() - start, 3)
+
+    pool_start = time.perf_counter()
+    await asyncio.gather(*(pool.submit(warm_up, RESAMPLER, segmenter) for _ in range(pool.workers)))
+    format_prediction(await batcher.submit(features), model_type)
+    cold_start["pool_warm_up"] = round(time.perf_counter() - pool_start, 3)
+    cold_start["warm_up"] = round(time.perf_counter() - start, 3)
 
 # STARTUP EVENT
 @app.on_event("startup")
 async def startup_event():
+    global ready
     logger.info("Starting NeoParental Prediction API...")
-    load_model()
+    start = time.perf_counter()
+    await load_model()
+    cold_start["model_load"] = round(time.perf_counter() - start, 3)
+    if model is None:
+        return
+    pool.start()
+    if WARM_UP:
+        try:
+            await warm_up_workers()
+        except Exception as e:
+            logger.error(f"Warm-up failed: {e}")
+            return
+        logger.info(f"Warm-up finished in {cold_start['warm_up']}s")
+    cold_start["startup"] = round(time.perf_counter() - import_start, 3)
+    ready = True
+
+# SHUTDOWN EVENT
+@app.on_event("shutdown")
+async def shutdown_event():
+    global ready
+    ready = False
+    logger.info("Draining inference pool...")
+    await pool.shutdown(DRAIN_TIMEOUT)
+    stream_executor.shutdown(wait=False, cancel_futures=True)
 
 # HEALTH CHECK
 @app.get("/", response_model=HealthResponse)
 async def root():
     return HealthResponse(
         status="online",
+        ready=is_ready(),
         model_loaded=model is not None,
         model_type=model_type,
         model_metadata=model_metadata,
+        cache=result_cache.stats(),
+        cold_start=cold_start,
         timestamp=datetime.now().isoformat()
     )
 
@@ -178,52 +491,253 @@ async def health_check():
 
 # PREDICTION ENDPOINT
 @app.post("/predict", response_model=PredictionResponse)
-async def predict_audio(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def predict_audio(file: UploadFile = File(...)):
     """Predict baby cry category using the trained model."""
+    await reload_model_if_changed()
     if model is None:
+        record_error("predict", "unavailable")
         raise HTTPException(status_code=503, detail="Model not loaded.")
     if not validate_audio_file(file):
+        record_error("predict", "invalid")
         raise HTTPException(status_code=400, detail="Invalid audio format.")
 
-    temp_file = TEMP_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
-    start_time = datetime.now()
+    start_time = time.perf_counter()
 
     try:
-        contents = await file.read()
-        if len(contents) > 10 * 1024 * 1024:
+        contents = await read_upload(file)
+        if len(contents) > MAX_FILE_SIZE:
+            record_error("predict", "invalid")
             raise HTTPException(status_code=400, detail="File exceeds 10MB limit.")
-        with open(temp_file, "wb") as f:
-            f.write(contents)
-
-        features = extract_audio_features(temp_file)
-
-        # Prediction + confidence handling
-        if model_type == "classifier":
-            probs = model.predict_proba(features)[0]
-            pred_index = int(np.argmax(probs))
-            confidence = float(np.max(probs))
-            prediction_value = pred_index
-            predicted_label = class_labels.get(pred_index, None)
 
-        else:  # Regressor
-            prediction_value = float(model.predict(features)[0])
-            predicted_label = class_labels.get(round(prediction_value), None)
-            # Simulate confidence based on proximity to integer class
-            confidence = max(0.0, 1.0 - abs(prediction_value - round(prediction_value)))
+        (prediction_value, predicted_label, confidence), segments, cached = await predict_contents(
+            contents, file.filename
+        )
 
+        processing_time = time.perf_counter() - start_time
+        if METRICS:
+            request_seconds.observe(processing_time, "predict")
         return PredictionResponse(
             prediction_value=prediction_value,
             predicted_label=predicted_label,
-            confidence=round(confidence * 100, 2),
-            processing_time=(datetime.now() - start_time).total_seconds(),
-            timestamp=datetime.now().isoformat()
+            confidence=confidence,
+            processing_time=processing_time,
+            timestamp=datetime.now().isoformat(),
+            cached=cached,
+            segments=segment_models(segments)
         )
 
+    except HTTPException:
+        raise
+    except PoolSaturated:
+        record_error("predict", "saturated")
+        raise HTTPException(status_code=503, detail="Server busy, try again shortly.",
+                            headers={"Retry-After": RETRY_AFTER})
+    except asyncio.TimeoutError:
+        record_error("predict", "timeout")
+        raise HTTPException(status_code=504, detail="Prediction timed out.")
+    except FeatureExtractionError as e:
+        record_error("predict", "extraction")
+        logger.error(f"Feature extraction error: {e}")
+        raise HTTPException(status_code=400, detail=f"Feature extraction failed: {e}")
     except Exception as e:
+        record_error("predict", "internal")
         logger.error(f"Prediction error: {e}")
         raise HTTPException(status_code=500, detail=f"Error: {e}")
+
+# BATCH PREDICTION ENDPOINT
+BUSY_ERROR = "Server busy, try again shortly."
+
+async def predict_batch_item(file: UploadFile) -> BatchPredictionItem:
+    if not validate_audio_file(file):
+        record_error("predict_batch", "invalid")
+        return BatchPredictionItem(filename=file.filename, error="Invalid audio format.")
+    contents = await read_upload(file)
+    if len(contents) > MAX_FILE_SIZE:
+        record_error("predict_batch", "invalid")
+        return BatchPredictionItem(filename=file.filename, error="File exceeds 10MB limit.")
+    try:
+        (prediction_value, predicted_label, confidence), segments, _ = await predict_contents(
+            contents, file.filename
+        )
+    except FeatureExtractionError as e:
+        record_error("predict_batch", "extraction")
+        return BatchPredictionItem(filename=file.filename,
+                                   error=f"Feature extraction failed: {e}")
+    except PoolSaturated:
+        record_error("predict_batch", "saturated")
+        return BatchPredictionItem(filename=file.filename, error=BUSY_ERROR)
+    except asyncio.TimeoutError:
+        record_error("predict_batch", "timeout")
+        return BatchPredictionItem(filename=file.filename, error="Prediction timed out.")
+    return BatchPredictionItem(
+        filename=file.filename,
+        prediction_value=prediction_value,
+        predicted_label=predicted_label,
+        confidence=confidence,
+        segments=segment_models(segments)
+    )
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_audio_batch(files: List[UploadFile] = File(...)):
+    """Predict several recordings at once; they share one batched inference call."""
+    await reload_model_if_changed()
+    if model is None:
+        record_error("predict_batch", "unavailable")
+        raise HTTPException(status_code=503, detail="Model not loaded.")
+    if len(files) > MAX_BATCH_FILES:
+        record_error("predict_batch", "invalid")
+        raise HTTPException(status_code=400,
+                            detail=f"At most {MAX_BATCH_FILES} files per batch.")
+
+    start_time = time.perf_counter()
+
+    try:
+        # A batch never holds more pool slots than there are workers, so it
+        # can't saturate the admission queue on its own
+        slots = asyncio.Semaphore(pool.workers)
+
+        async def predict_with_slot(file: UploadFile) -> BatchPredictionItem:
+            async with slots:
+                return await predict_batch_item(file)
+
+        # Every item reports its own failure, so one rejected or timed-out
+        # file neither discards the others' results nor leaves them running
+        outcomes = await asyncio.gather(*(predict_with_slot(file) for file in files),
+                                        return_exceptions=True)
+        results = []
+        for file, outcome in zip(files, outcomes):
+            if isinstance(outcome, Exception):
+                record_error("predict_batch", "internal")
+                logger.error(f"Batch prediction error for {file.filename}: {outcome}")
+                outcome = BatchPredictionItem(filename=file.filename, error=f"Error: {outcome}")
+            results.append(outcome)
+        if all(item.error == BUSY_ERROR for item in results):
+            # Nothing was processed; let the client back off and retry the whole batch
+            raise HTTPException(status_code=503, detail=BUSY_ERROR,
+                                headers={"Retry-After": RETRY_AFTER})
+
+        processing_time = time.perf_counter() - start_time
+        if METRICS:
+            request_seconds.observe(processing_time, "predict_batch")
+        return BatchPredictionResponse(
+            results=results,
+            processing_time=processing_time,
+            timestamp=datetime.now().isoformat()
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        record_error("predict_batch", "internal")
+        logger.error(f"Batch prediction error: {e}")
+        raise HTTPException(status_code=500, detail=f"Error: {e}")
+
+# STREAMING ENDPOINT
+active_streams = 0
+
+def stream_update(stream: StreamingFeatures, samples: Optional[np.ndarray],
+                  emit: bool) -> Optional[np.ndarray]:
+    """Feed samples (None = end of stream); returns the window features when emitting."""
+    if samples is None:
+        stream.finish()
+    else:
+        stream.push(samples)
+    return stream.features() if emit else None
+
+@app.websocket("/ws/stream")
+async def stream_audio(websocket: WebSocket, sample_format: str = "s16"):
+    """Continuous monitoring over a live PCM stream.
+
+    Send mono 16 kHz little-endian PCM as binary messages (``sample_format``
+    s16 or f32) and the text message "end" to finish. The server replies with
+    JSON prediction messages every STREAM_EMIT_MS of audio and once more at the end.
+    """
+    global active_streams
+    await websocket.accept()
+    if model is None or active_streams >= MAX_STREAMS:
+        record_error("stream", "saturated")
+        await websocket.close(code=1013, reason="Server busy, try again shortly.")
+        return
+    if sample_format not in STREAM_FORMATS:
+        record_error("stream", "invalid")
+        await websocket.close(code=1003, reason=f"sample_format must be one of {list(STREAM_FORMATS)}")
+        return
+
+    active_streams += 1
+    dtype = STREAM_FORMATS[sample_format]
+    stream = StreamingFeatures(STREAM_WINDOW_SECONDS)
+    emit_samples = int(STREAM_EMIT_MS * SAMPLE_RATE / 1000)
+    next_emit = emit_samples
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("text") == "end":
+                samples = None
+            elif message.get("bytes") is not None:
+                data = message["bytes"]
+                if len(data) > MAX_STREAM_CHUNK:
+                    record_error("stream", "invalid")
+                    await websocket.close(code=1009, reason="Chunk too large.")
+                    break
+                samples = np.frombuffer(data[:len(data) - len(data) % np.dtype(dtype).itemsize], dtype=dtype)
+                if dtype is np.int16:
+                    samples = samples.astype(np.float32) / 32768.0
+            else:
+                continue
+
+            emit = samples is None or stream.samples_seen + len(samples) >= next_emit
+            update_start = time.perf_counter()
+            features = await asyncio.wait_for(
+                asyncio.get_running_loop().run_in_executor(
+                    stream_executor, stream_update, stream, samples, emit
+                ),
+                REQUEST_TIMEOUT
+            )
+            if not emit:
+                continue
+            if METRICS:
+                stage_seconds.observe(time.perf_counter() - update_start, "stream_features")
+            next_emit = (stream.samples_seen // emit_samples + 1) * emit_samples
+
+            if features is not None:
+                scorer, scorer_type = batcher, model_type
+                prediction_value, predicted_label, confidence = format_prediction(
+                    await scorer.submit(features), scorer_type
+                )
+                await websocket.send_json({
+                    "type": "prediction",
+                    "prediction_value": prediction_value,
+                    "predicted_label": predicted_label,
+                    "confidence": confidence,
+                    "stream_seconds": round(stream.seconds, 3),
+                    "window_seconds": min(STREAM_WINDOW_SECONDS, stream.seconds),
+                    "final": samples is None,
+                    "timestamp": datetime.now().isoformat()
+                })
+            if samples is None:
+                await websocket.close()
+                break
+    except WebSocketDisconnect:
+        pass
+    except asyncio.TimeoutError:
+        record_error("stream", "timeout")
+        logger.error(f"Stream update timed out after {REQUEST_TIMEOUT}s")
+        await websocket.close(code=1011, reason="Stream processing timed out.")
+    except Exception as e:
+        record_error("stream", "internal")
+        logger.error(f"Stream error: {e}")
+        await websocket.close(code=1011, reason="Stream processing failed.")
     finally:
-        background_tasks.add_task(cleanup_file, temp_file)
+        active_streams -= 1
+
+# METRICS ENDPOINT
+if METRICS:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint():
+        """Prometheus scrape target."""
+        return Response(registry.render(), media_type=CONTENT_TYPE)
 
 # ERROR HANDLER
 @app.exception_handler(Exception)
@@ -240,4 +754,5 @@ async def general_exception_handler(_, exc: Exception):
 
 # RUN SERVER
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=False, log_level="info")
@@ -0,0 +1,113 @@
+# Energy-based cry segmentation
+#
+# A cheap pre-pass over the decoded upload, at its native sample rate, that
+# finds the loud regions (the cry) and drops the silence and background
+# around them. Frame energies come from one cumulative sum of the squared
+# signal, so the pass is O(n) and a small fraction of the spectral feature
+# cost. Only the selected segments are resampled and featurized, and their
+# total length is capped, so analysis cost follows cry content rather than
+# recording length.
+from typing import List, Tuple
+
+import numpy as np
+
+FRAME_SECONDS = 0.025
+HOP_SECONDS = 0.010
+
+
+class CrySegmenter:
+    """Finds cry segments by frame energy relative to the loudest frame.
+
+    Frames within ``threshold_db`` of the loudest one (and above
+    ``floor_db`` dBFS) are active. Active runs separated by less than
+    ``max_gap`` seconds are merged, runs shorter than ``min_duration`` are
+    dropped, and each segment is padded by ``padding`` seconds. The loudest
+    segments are kept until ``max_seconds`` of audio is selected.
+    """
+
+    def __init__(self, threshold_db: float = -30.0, floor_db: float = -60.0,
+                 min_duration: float = 0.2, max_gap: float = 0.3,
+                 padding: float = 0.15, max_seconds: float = 10.0):
+        if max_seconds <= 0:
+            raise ValueError(f"max_seconds must be positive, got {max_seconds}")
+        self.threshold_db = threshold_db
+        self.floor_db = floor_db
+        self.min_duration = min_duration
+        self.max_gap = max_gap
+        self.padding = padding
+        self.max_seconds = max_seconds
+
+    @property
+    def key(self) -> str:
+        """Identifies the settings, for cache keys."""
+        return (f"seg{self.threshold_db:g}/{self.floor_db:g}/{self.min_duration:g}/"
+                f"{self.max_gap:g}/{self.padding:g}/{self.max_seconds:g}")
+
+    def frame_energy_db(self, y: np.ndarray, sr: int) -> Tuple[np.ndarray, int, int]:
+        """Mean-square energy (dBFS) of every frame; returns (energy_db, frame, hop)."""
+        frame = max(1, int(FRAME_SECONDS * sr))
+        hop = max(1, int(HOP_SECONDS * sr))
+        if len(y) < frame:
+            frame = max(1, len(y))
+        squares = np.concatenate(([0.0], np.cumsum(np.square(y, dtype=np.float64))))
+        starts = np.arange(0, len(y) - frame + 1, hop)
+        energy = (squares[starts + frame] - squares[starts]) / frame
+        return 10 * np.log10(np.maximum(energy, 1e-12)), frame, hop
+
+    def find(self, y: np.ndarray, sr: int) -> List[Tuple[int, int]]:
+        """Active (start, end) sample ranges, in order, before the duration cap."""
+        if len(y) == 0:
+            return []
+        energy_db, frame, hop = self.frame_energy_db(y, sr)
+        threshold = max(energy_db.max() + self.threshold_db, self.floor_db)
+        active = np.flatnonzero(energy_db >= threshold)
+        if len(active) == 0:
+            return []
+
+        # Runs of consecutive active frames, bridging short gaps
+        max_gap = int(self.max_gap * sr / hop)
+        breaks = np.flatnonzero(np.diff(active) > max_gap + 1)
+        run_starts = active[np.concatenate(([0], breaks + 1))]
+        run_ends = active[np.concatenate((breaks, [len(active) - 1]))]
+
+        pad = int(self.padding * sr)
+        min_length = int(self.min_duration * sr)
+        segments = []
+        for first, last in zip(run_starts, run_ends):
+            start, end = first * hop, last * hop + frame
+            if end - start < min_length:
+                continue
+            start, end = max(0, start - pad), min(len(y), end + pad)
+            if segments and start <= segments[-1][1]:
+                segments[-1] = (segments[-1][0], end)
+            else:
+                segments.append((start, end))
+        return segments
+
+    def select(self, y: np.ndarray, sr: int) -> List[Tuple[int, int]]:
+        """Segments to analyze, in order, totalling at most ``max_seconds``.
+
+        Falls back to the start of the recording when nothing is loud enough.
+        """
+        budget = int(self.max_seconds * sr)
+        segments = self.find(y, sr)
+        if not segments:
+            return [(0, min(len(y), budget))] if len(y) else []
+
+        def loudness(segment):
+            start, end = segment
+            return np.mean(np.square(y[start:end], dtype=np.float64))
+
+        # A later segment cut down to less than min_duration is too short to
+        # featurize, so it is skipped; a quieter, shorter one may still fit
+        min_length = int(self.min_duration * sr)
+        selected = []
+        for start, end in sorted(segments, key=loudness, reverse=True):
+            if budget <= 0:
+                break
+            end = min(end, start + budget)
+            if selected and end - start < min_length:
+                continue
+            selected.append((start, end))
+            budget -= end - start
+        return sorted(selected)
@@ -0,0 +1,182 @@
+# Incremental features for live PCM streams
+#
+# Every value in the feature vector is a mean over frames, so a sliding
+# window can be maintained from per-frame state instead of re-running the
+# whole pipeline on the window:
+#   - both STFTs are computed only for frames completed by new audio
+#   - mel and tonnetz use running sums over a fixed-size frame ring
+#   - MFCC, chroma and contrast need window-wide statistics (the 80 dB
+#     power_to_db floor and the tuning estimate), which are reduced from
+#     the stored frames at emit time; that is cheap next to the STFT/CQT
+#   - the CQT behind tonnetz runs on a short segment with fixed context on
+#     both sides, so its frames lag the stream by CQT_CONTEXT
+# Memory per stream is bounded by the window length, not the stream length.
+#
+# Once finish() is called, MFCC/chroma/mel/contrast over a window that spans
+# the whole stream match batch extraction to float32 rounding. Tonnetz frames
+# use the tuning estimated from the window when each frame is finalized
+# rather than the whole-clip tuning, so they drift slightly from batch.
+import librosa
+import numpy as np
+import scipy.fftpack
+
+from features import (
+    CHROMA_HOP_LENGTH, CHROMA_N_FFT, FEATURE_DIM, FMIN, HOP_LENGTH, N_BANDS,
+    N_FFT, N_MELS, N_MFCC, SAMPLE_RATE, WIN_LENGTH, WINDOW, estimate_tunings,
+    mel_basis,
+)
+
+# Samples of audio kept on each side of a CQT frame; about half the longest
+# CQT filter (C1 at 36 bins/octave), rounded to whole hops
+CQT_CONTEXT = 25 * CHROMA_HOP_LENGTH
+
+
+class _FrameRing:
+    """Last ``capacity`` frame rows, with a running sum of them."""
+
+    def __init__(self, capacity: int, dim: int):
+        # Rows keep the float32 precision librosa produces; sums are float64
+        self.rows = np.zeros((capacity, dim), dtype=np.float32)
+        self.sum = np.zeros(dim)
+        self.count = 0
+        self._pos = 0
+
+    def extend(self, rows: np.ndarray):
+        capacity = len(self.rows)
+        for row in rows[-capacity:]:
+            if self.count == capacity:
+                self.sum -= self.rows[self._pos]
+            else:
+                self.count += 1
+            self.rows[self._pos] = row
+            self.sum += row
+            self._pos = (self._pos + 1) % capacity
+        # Re-anchor once per lap so add/subtract rounding cannot accumulate
+        if self._pos < len(rows):
+            self.sum = self.rows[:self.count].sum(axis=0, dtype=np.float64)
+
+    def frames(self) -> np.ndarray:
+        """Stored rows, oldest first."""
+        if self.count < len(self.rows):
+            return self.rows[:self.count]
+        return np.roll(self.rows, -self._pos, axis=0)
+
+    def mean(self) -> np.ndarray:
+        return self.sum / self.count
+
+
+class _StftStream:
+    """STFT frames of a growing signal, as librosa.stft(center=True) would
+    produce them, emitted as soon as each frame is complete."""
+
+    def __init__(self, n_fft: int, hop_length: int, win_length: int = None):
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.win_length = win_length
+        # Same zero padding center=True adds at the start of the signal
+        self.buffer = np.zeros(n_fft // 2, dtype=np.float32)
+
+    def push(self, y: np.ndarray) -> np.ndarray:
+        """Append samples; returns magnitude frames as rows (n_new, 1 + n_fft // 2)."""
+        self.buffer = np.concatenate((self.buffer, y))
+        n_frames = 1 + (len(self.buffer) - self.n_fft) // self.hop_length
+        if n_frames <= 0:
+            return np.empty((0, 1 + self.n_fft // 2))
+        span = (n_frames - 1) * self.hop_length + self.n_fft
+        S = np.abs(librosa.stft(
+            self.buffer[:span], n_fft=self.n_fft, hop_length=self.hop_length,
+            win_length=self.win_length, window=WINDOW, center=False
+        ))
+        self.buffer = self.buffer[n_frames * self.hop_length:]
+        return S.T
+
+
+class StreamingFeatures:
+    """Sliding-window feature vector over a live mono stream at SAMPLE_RATE."""
+
+    def __init__(self, window_seconds: float, sr: int = SAMPLE_RATE):
+        self.sr = sr
+        self.samples_seen = 0
+        self._mel_stft = _StftStream(N_FFT, HOP_LENGTH, WIN_LENGTH)
+        self._chroma_stft = _StftStream(CHROMA_N_FFT, CHROMA_HOP_LENGTH)
+        self._mel = _FrameRing(int(window_seconds * sr / HOP_LENGTH), N_MELS)
+        chroma_frames = int(window_seconds * sr / CHROMA_HOP_LENGTH)
+        self._stft = _FrameRing(chroma_frames, 1 + CHROMA_N_FFT // 2)
+        self._tonnetz = _FrameRing(chroma_frames, 6)
+
+        # Audio for the CQT, starting at sample self._cqt_start (a hop multiple)
+        self._cqt_audio = np.zeros(0, dtype=np.float32)
+        self._cqt_start = 0
+        self._cqt_next_frame = 0
+        self._finished = False
+
+    @property
+    def seconds(self) -> float:
+        return self.samples_seen / self.sr
+
+    def push(self, y: np.ndarray):
+        if self._finished:
+            raise ValueError("Stream already finished")
+        y = np.asarray(y, dtype=np.float32)
+        self.samples_seen += len(y)
+        power = self._mel_stft.push(y) ** 2
+        if len(power):
+            self._mel.extend(power @ mel_basis(self.sr).T)
+        self._stft.extend(self._chroma_stft.push(y))
+        self._cqt_audio = np.concatenate((self._cqt_audio, y))
+
+    def finish(self):
+        """End of stream: pad like center=True does and finalize trailing frames."""
+        self._mel.extend((self._mel_stft.push(np.zeros(N_FFT // 2)) ** 2) @ mel_basis(self.sr).T)
+        self._stft.extend(self._chroma_stft.push(np.zeros(CHROMA_N_FFT // 2)))
+        self._finished = True
+
+    def _update_tonnetz(self, tuning: float):
+        hop = CHROMA_HOP_LENGTH
+        end = self._cqt_start + len(self._cqt_audio)
+        # Frames whose right-hand context has fully arrived; once the stream
+        # has ended, every frame up to the last one batch extraction produces
+        last_frame = self.samples_seen // hop if self._finished else (end - CQT_CONTEXT) // hop
+        if last_frame < self._cqt_next_frame:
+            return
+        chroma = librosa.feature.chroma_cqt(
+            y=self._cqt_audio, sr=self.sr, hop_length=hop, tuning=tuning
+        )
+        first = self._cqt_next_frame - self._cqt_start // hop
+        count = last_frame - self._cqt_next_frame + 1
+        tonnetz = librosa.feature.tonnetz(sr=self.sr, chroma=chroma[:, first:first + count])
+        self._tonnetz.extend(tonnetz.T)
+        self._cqt_next_frame = last_frame + 1
+
+        # Keep only the left-hand context the next frames need
+        keep_from = max(0, self._cqt_next_frame * hop - CQT_CONTEXT)
+        keep_from -= keep_from % hop
+        self._cqt_audio = self._cqt_audio[keep_from - self._cqt_start:]
+        self._cqt_start = keep_from
+
+    def features(self):
+        """Current window's feature vector, or None until every family has frames.
+
+        A stream ended before any audio arrived stays None: finish() pads the
+        STFTs with silence, but there is nothing to describe.
+        """
+        if self.samples_seen == 0 or self._mel.count == 0 or self._stft.count == 0:
+            return None
+        S = self._stft.frames().T
+        chroma_tuning, cqt_tuning = estimate_tunings(S, self.sr)
+        self._update_tonnetz(cqt_tuning)
+        if self._tonnetz.count == 0:
+            return None
+
+        mel = self._mel.mean()
+        # DCT is linear, so the mean of per-frame MFCCs is the DCT of the mean dB frame
+        mel_db = librosa.power_to_db(self._mel.frames().T)
+        mfcc = scipy.fftpack.dct(mel_db.mean(axis=1), type=2, norm='ortho')[:N_MFCC]
+        chroma = np.mean(librosa.feature.chroma_stft(S=S, sr=self.sr, tuning=chroma_tuning), axis=1)
+        contrast = np.mean(librosa.feature.spectral_contrast(
+            S=S, sr=self.sr, n_bands=N_BANDS, fmin=FMIN
+        ), axis=1)
+
+        features = np.concatenate((mfcc, chroma, mel, contrast, self._tonnetz.mean()))
+        assert features.shape == (FEATURE_DIM,)
+        return features
@@ -0,0 +1,226 @@
+# Worker pool for feature extraction and inference
+#
+# Keeps librosa off the event loop. Jobs run in a process pool
+# (or a thread pool) behind a bounded admission counter, so a saturated
+# server rejects new work immediately instead of queueing it without limit.
+import asyncio
+import io
+import logging
+import threading
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from audio import decode_native, resample
+from features import SAMPLE_RATE, StageTimer, compute_features
+from segmentation import CrySegmenter
+
+logger = logging.getLogger(__name__)
+
+WORKER_MODES = ("process", "thread")
+
+class FeatureExtractionError(Exception):
+    """The upload could not be decoded or featurized."""
+
+
+class PoolSaturated(Exception):
+    """Every worker is busy and the admission queue is full."""
+
+
+def extract_features(contents: bytes, filename: str, res_type: str,
+                     timings: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Decode an upload and return its 1-D feature vector.
+
+    If ``timings`` is given, seconds spent in decode, resample and each
+    feature stage are accumulated into it.
+    """
+    try:
+        timer = StageTimer(timings)
+        y, native_sr = decode_native(contents, Path(filename).suffix)
+        timer.mark("decode")
+        y = resample(y, native_sr, SAMPLE_RATE, res_type)
+        timer.mark("resample")
+        return compute_features(y, SAMPLE_RATE, timings)
+    except Exception as e:
+        raise FeatureExtractionError(str(e) or e.__class__.__name__) from None
+
+
+def extract_segmented_features(contents: bytes, filename: str, res_type: str,
+                               segmenter: CrySegmenter,
+                               timings: Optional[Dict[str, float]] = None
+                               ) -> Tuple[np.ndarray, List[Tuple[float, float]]]:
+    """Like extract_features, but only featurizes the cry segments.
+
+    Segments are found at the upload's native rate, so the silence around
+    them is never resampled. Returns (features, [(start, end) seconds]).
+    """
+    try:
+        timer = StageTimer(timings)
+        y, native_sr = decode_native(contents, Path(filename).suffix)
+        timer.mark("decode")
+        segments = segmenter.select(y, native_sr)
+        if not segments:
+            raise ValueError("Audio is empty")
+        timer.mark("segment")
+        y = np.concatenate([
+            resample(y[start:end], native_sr, SAMPLE_RATE, res_type) for start, end in segments
+        ])
+        timer.mark("resample")
+        features = compute_features(y, SAMPLE_RATE, timings)
+    except Exception as e:
+        raise FeatureExtractionError(str(e) or e.__class__.__name__) from None
+    return features, [(round(start / native_sr, 3), round(end / native_sr, 3))
+                      for start, end in segments]
+
+
+def timed(fn: Callable, *args) -> Tuple[Any, Dict[str, float]]:
+    """Pool job wrapper: returns (``fn(*args)``, its per-stage seconds)."""
+    timings: Dict[str, float] = {}
+    return fn(*args, timings=timings), timings
+
+
+def warm_up_clip(seconds: float = 2.0, sr: int = 8000) -> bytes:
+    """A short synthetic cry-like WAV: a pitch-modulated harmonic tone under an envelope."""
+    t = np.arange(int(seconds * sr)) / sr
+    phase = 2 * np.pi * np.cumsum(450 + 100 * np.sin(2 * np.pi * 1.5 * t)) / sr
+    y = sum(np.sin(k * phase) / k for k in range(1, 5)) * np.hanning(len(t)) * 0.3
+    y += np.random.default_rng(0).normal(0, 1e-3, len(t))
+    buffer = io.BytesIO()
+    sf.write(buffer, y.astype(np.float32), sr, format="WAV")
+    return buffer.getvalue()
+
+
+def warm_up(res_type: str, segmenter: Optional[CrySegmenter] = None) -> np.ndarray:
+    """Run the upload feature path once on a synthetic clip.
+
+    The first call in a process compiles librosa's and resampy's lazily
+    jitted numba kernels, which makes it several times slower than steady state.
+    """
+    clip = warm_up_clip()
+    if segmenter is None:
+        return extract_features(clip, "warmup.wav", res_type)
+    return extract_segmented_features(clip, "warmup.wav", res_type, segmenter)[0]
+
+
+def _ping() -> bool:
+    return True
+
+
+class InferencePool:
+    def __init__(self, mode: str, workers: int, queue_size: int, timeout: float):
+        if mode not in WORKER_MODES:
+            raise ValueError(f"Worker mode must be one of {WORKER_MODES}, got '{mode}'")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, queue_size)
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._closing = False
+        self._rebuild_task: Optional[asyncio.Task] = None
+        self.restarts = 0
+
+    @property
+    def depth(self) -> int:
+        """Jobs admitted and not yet finished (running + queued)."""
+        return self._pending
+
+    @property
+    def available(self) -> bool:
+        """False when stopped, draining, or rebuilding after a worker crash."""
+        return self._executor is not None and not self._closing
+
+    def _new_executor(self) -> Executor:
+        if self.mode == "process":
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+
+    def start(self):
+        self._executor = self._new_executor()
+        self._closing = False
+        logger.info(f"Inference pool started: {self.workers} {self.mode} worker(s), "
+                    f"capacity {self.capacity}, timeout {self.timeout}s")
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.set()
+
+    async def submit(self, fn, *args):
+        """Run ``fn(*args)`` on the pool.
+
+        Raises PoolSaturated when at capacity, draining or rebuilding, and
+        asyncio.TimeoutError when the job exceeds the per-request timeout.
+        """
+        with self._lock:
+            executor = self._executor
+            if executor is None or self._closing or self._pending >= self.capacity:
+                raise PoolSaturated()
+            self._pending += 1
+            self._idle.clear()
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenExecutor:
+            self._release(None)
+            self._schedule_rebuild(executor)
+            raise PoolSaturated() from None
+        except Exception:
+            self._release(None)
+            raise
+        # The slot is freed when the job really finishes, not when the caller
+        # gives up, so timed-out jobs still count against capacity.
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except BrokenExecutor:
+            # A worker died (e.g. OOM-killed); the whole executor is unusable
+            self._schedule_rebuild(executor)
+            raise PoolSaturated() from None
+
+    def _schedule_rebuild(self, broken: Executor):
+        with self._lock:
+            if self._executor is not broken:
+                return  # already rebuilding, or stopped
+            self._executor = None
+        self._rebuild_task = asyncio.get_running_loop().create_task(self._rebuild(broken))
+
+    async def _rebuild(self, broken: Executor):
+        """Replace a broken executor once; new jobs are rejected until it is back."""
+        logger.error("Inference pool worker died, rebuilding the pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+        executor = self._new_executor()
+        try:
+            # Forces the workers up before traffic is admitted again
+            await asyncio.wrap_future(executor.submit(_ping))
+        except Exception as e:
+            logger.error(f"Rebuilt inference pool failed its first job: {e}")
+        with self._lock:
+            if self._closing:
+                executor.shutdown(wait=False, cancel_futures=True)
+                return
+            self._executor = executor
+        self.restarts += 1
+        logger.info(f"Inference pool rebuilt ({self.restarts} restart(s))")
+
+    async def shutdown(self, drain_timeout: float):
+        """Stop admitting work, wait up to ``drain_timeout`` for in-flight jobs, then stop."""
+        self._closing = True
+        if self._rebuild_task is not None:
+            await self._rebuild_task
+        if self._executor is None:
+            return
+        drained = await asyncio.get_running_loop().run_in_executor(
+            None, self._idle.wait, drain_timeout
+        )
+        if not drained:
+            logger.warning(f"Inference pool drain timed out with {self.depth} job(s) in flight")
+        self._executor.shutdown(wait=drained, cancel_futures=True)
+        self._executor = None
+        logger.info("Inference pool stopped")